@@ -2,26 +2,63 @@
 WebWhisper 应用入口模块
 初始化 Flask 应用
 """
+# 必须在其他模块之前打补丁，使线程、队列和 socket 都在 eventlet 事件循环上协作调度
+import eventlet
+eventlet.monkey_patch()
+
 import os
-import logging
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时使用 SocketIO 默认的 json 模块
+    orjson = None
 
 from pycore.base import Core
 from pycore.logger import Logger
 from pycore.utils.tools import Tools
 from pycore.utils.file_utils import FileUtils
 
-from flask import Flask, render_template
+from flask import Flask, render_template, request, url_for
 from flask_socketio import SocketIO
 
 from webwhisper.utils.logging_utils import logger
 from webwhisper.api.routes import api
 from webwhisper.api.websocket import websocket_namespace
-from webwhisper.config import config
+from webwhisper.utils.whisper_utils import prewarm_prep_pool
+from webwhisper.config import config, ensure_dir
 
 # 全局变量
 socketio = None
 app = None
 
+# 前端依赖库：本地文件名（带版本号） -> CDN 地址
+# 将文件放入 static/vendor/ 后优先使用本地文件，否则回退到 CDN
+VENDOR_ASSETS = {
+    'bootstrap-5.3.0-alpha1.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css',
+    'bootstrap-5.2.3.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.2.3/dist/js/bootstrap.bundle.min.js',
+    'socket.io-4.6.1.min.js': 'https://cdn.jsdelivr.net/npm/socket.io@4.6.1/client-dist/socket.io.min.js',
+}
+
+# 本地依赖库的缓存时间（文件名带版本号，可长期缓存）
+VENDOR_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class OrjsonWrapper:
+    """
+    供 SocketIO 使用的 orjson 编解码器
+    
+    接口与标准库 json 模块兼容，忽略 separators 等格式参数（orjson 输出本身即为紧凑格式）
+    """
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+    
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_app():
     """
     创建 Flask 应用
@@ -44,6 +81,26 @@ def create_app():
     # 注册蓝图
     app.register_blueprint(api)
     
+    # 启动时检查一次哪些依赖库已放到本地
+    vendor_dir = os.path.join(app.static_folder, 'vendor')
+    local_vendor = {name for name in VENDOR_ASSETS if os.path.isfile(os.path.join(vendor_dir, name))}
+    
+    @app.context_processor
+    def inject_vendor_url():
+        """提供 vendor_url 模板函数"""
+        def vendor_url(name):
+            if name in local_vendor:
+                return url_for('static', filename=f'vendor/{name}')
+            return VENDOR_ASSETS[name]
+        return {'vendor_url': vendor_url}
+    
+    @app.after_request
+    def add_vendor_cache_headers(response):
+        """为本地依赖库设置长期缓存"""
+        if request.path.startswith('/static/vendor/'):
+            response.headers['Cache-Control'] = VENDOR_CACHE_CONTROL
+        return response
+    
     # 主页路由
     @app.route('/')
     def index():
@@ -67,26 +124,26 @@ def create_socketio(app):
     """
     # 创建 SocketIO 实例
     global socketio
+    # 安装了 orjson 时使用 C 实现编码负载，完成通知中的长文本不再阻塞发送
+    socketio_options = {'json': OrjsonWrapper} if orjson else {}
     socketio = SocketIO(
         app, 
         manage_session=False,
         # 添加以下配置以支持多进程环境
-        async_mode='gevent',  # 使用 gevent 作为异步模式
+        async_mode='eventlet',  # 使用 eventlet 作为异步模式，原生支持 WebSocket
         cors_allowed_origins="*",  # 允许所有来源的跨域请求
-        logger=True,  # 启用 SocketIO 日志
-        engineio_logger=True  # 启用 EngineIO 日志
+        logger=config.get('verbose_logging'),  # 仅在开启详细日志时启用 SocketIO 日志
+        engineio_logger=config.get('verbose_logging'),  # 仅在开启详细日志时启用 EngineIO 日志
+        **socketio_options
     )
     
-    # 初始化命名空间
-    from webwhisper.api.websocket import websocket_namespace
-    
     # 注册命名空间
     # socketio.on_namespace(websocket_namespace)
     
     # 初始化应用
     websocket_namespace.init_app(socketio, app)
     
-    logger.info("SocketIO 已初始化，使用异步模式: gevent")
+    logger.info("SocketIO 已初始化，使用异步模式: eventlet")
     
     return socketio
 
@@ -99,25 +156,23 @@ def main():
     socketio = create_socketio(app)
     
     # 确保必要的目录存在
-    os.makedirs(config.get('upload_folder'), exist_ok=True)
-    os.makedirs(config.get('temp_folder'), exist_ok=True)
-    os.makedirs(config.get('models_folder'), exist_ok=True)
+    ensure_dir(config.get('upload_folder'))
+    ensure_dir(config.get('temp_folder'))
+    ensure_dir(config.get('models_folder'))
     
     # 检查模板目录是否存在
     templates_dir = FileUtils.get_project_path("templates")
     if not os.path.exists(templates_dir):
         logger.warning("模板目录不存在，将使用默认模板")
     
-    # 检查是否安装了 gevent
-    try:
-        import gevent
-        logger.info(f"已检测到 gevent 版本: {gevent.__version__}")
-    except ImportError:
-        logger.warning("未检测到 gevent，请安装: pip install gevent")
+    logger.info(f"已检测到 eventlet 版本: {eventlet.__version__}")
+    
+    # 预热音频预处理线程池，避免首批上传请求承担创建线程的开销
+    prewarm_prep_pool()
     
     # 启动服务器
     logger.info("启动 WebWhisper...")
-    logger.info(f"使用配置: {config.as_dict}")
+    logger.info(f"使用配置: {config.snapshot()}")
     
     # 使用单进程模式运行
     socketio.run(
@@ -126,7 +181,7 @@ def main():
         port=config.get('port'),
         debug=config.get('debug'),
         use_reloader=False,  # 禁用重载器，避免启动多个进程
-        log_output=True      # 启用日志输出
+        log_output=config.get('verbose_logging')  # 仅在开启详细日志时输出请求日志
     )
 
 
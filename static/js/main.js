@@ -5,11 +5,16 @@
 // 全局变量
 let socket;
 let currentTaskId = null;
+let readyTaskId = null; // 已完成预处理、可以开始转录的任务ID
+let uploadReadyTimer = null; // 等待预处理完成通知的超时计时器
 let mediaPlayer = null;
 let isTranscribing = false;
 let subtitles = []; // 字幕数据
 let currentSubtitleIndex = -1; // 当前显示的字幕索引
 
+// 等待预处理完成通知的最长时间（毫秒），超时后允许直接开始转录，由服务器同步转换音频
+const UPLOAD_READY_TIMEOUT = 30000;
+
 // DOM 元素
 const elements = {
     // 媒体播放器
@@ -87,7 +92,7 @@ function initSocketIO() {
         reconnectionDelayMax: 5000,   // 最大重连延迟（毫秒）
         timeout: 20000,               // 连接超时（毫秒）
         autoConnect: true,            // 自动连接
-        transports: ['websocket', 'polling']  // 传输方式，优先使用 WebSocket
+        transports: ['websocket']     // 仅使用 WebSocket，轮询在 HTTP/2 下表现较差
     };
     
     debugLog(`Socket.IO 连接选项: ${JSON.stringify(options)}`);
@@ -102,6 +107,11 @@ function initSocketIO() {
             debugLog(`连接后自动重新订阅任务: ${currentTaskId}`);
             subscribeToTask(currentTaskId);
         }
+        
+        // 上传的文件仍在预处理时重新加入任务房间，避免错过重连期间的完成通知
+        if (currentTaskId && currentTaskId !== readyTaskId) {
+            watchUpload(currentTaskId);
+        }
     });
     
     // 连接错误事件
@@ -143,6 +153,28 @@ function initSocketIO() {
         debugLog(`Socket.IO 错误: ${JSON.stringify(error)}`, 'error');
     });
     
+    // 上传文件预处理完成事件
+    socket.on('upload_ready', (data) => {
+        debugLog(`收到文件预处理完成通知: task_id=${data.task_id}, duration=${data.duration}`);
+        readyTaskId = data.task_id;
+        if (data.task_id === currentTaskId) {
+            clearTimeout(uploadReadyTimer);
+        }
+        enableStartIfReady();
+    });
+    
+    // 上传文件预处理失败事件
+    socket.on('upload_error', (data) => {
+        debugLog(`收到文件预处理失败通知: task_id=${data.task_id}, error=${data.error}`, 'error');
+        if (data.task_id === currentTaskId && readyTaskId !== currentTaskId) {
+            // 预处理失败不影响转录，开始转录时服务器会重新转换音频
+            clearTimeout(uploadReadyTimer);
+            readyTaskId = currentTaskId;
+            updateStatus(`文件预处理失败，开始转录时将重新处理: ${data.error}`, 'warning');
+            elements.startBtn.disabled = false;
+        }
+    });
+    
     // 进度更新事件
     socket.on('progress_update', (data) => {
         debugLog(`收到进度更新: task_id=${data.task_id}, progress=${data.progress}, message=${data.message}`);
@@ -370,8 +402,8 @@ function formatTime(seconds) {
     return `${h.toString().padStart(2, '0')}:${m.toString().padStart(2, '0')}:${s.toString().padStart(2, '0')}`;
 }
 
-// 加载字幕
-function loadSubtitles(taskId) {
+// 加载字幕，lastProgress 不为空时长轮询，等到进度变化或任务结束再返回
+function loadSubtitles(taskId, lastProgress) {
     if (!taskId) {
         debugLog('无法加载字幕：任务ID为空', 'error');
         return;
@@ -380,7 +412,8 @@ function loadSubtitles(taskId) {
     debugLog(`开始加载字幕: task_id=${taskId}`);
     
     // 首先检查任务状态
-    fetch(`/check_task_status?task_id=${taskId}`)
+    const wait = lastProgress === undefined ? '' : `&wait=10&last_progress=${lastProgress}`;
+    fetch(`/check_task_status?task_id=${taskId}${wait}`)
         .then(response => {
             if (!response.ok) {
                 return response.json().then(data => {
@@ -397,9 +430,9 @@ function loadSubtitles(taskId) {
                     // 任务已完成，获取字幕
                     fetchSubtitles(taskId);
                 } else if (data.status === 'running') {
-                    // 任务仍在运行，稍后重试
-                    debugLog('任务仍在运行，2秒后重试加载字幕', 'warn');
-                    setTimeout(() => loadSubtitles(taskId), 2000);
+                    // 任务仍在运行，等待状态变化后重试
+                    debugLog('任务仍在运行，等待状态变化后重试加载字幕', 'warn');
+                    loadSubtitles(taskId, data.progress);
                 } else {
                     // 任务状态异常
                     debugLog(`任务状态异常，无法加载字幕: ${data.status}`, 'error');
@@ -496,6 +529,10 @@ function initFileUpload() {
         // 创建 FormData
         const formData = new FormData();
         formData.append('file', file);
+        if (socket && socket.connected) {
+            formData.append('sid', socket.id);
+        }
+        elements.startBtn.disabled = true;
         
         // 显示上传信息
         elements.uploadInfo.classList.remove('d-none');
@@ -511,8 +548,13 @@ function initFileUpload() {
         .then(data => {
             if (data.success) {
                 currentTaskId = data.task_id;
-                updateStatus(`文件 ${data.filename} 上传成功`, 'success');
-                elements.startBtn.disabled = false;
+                if (data.status === 'processing') {
+                    updateStatus(`文件 ${data.filename} 上传成功，正在处理...`, 'info');
+                    watchUpload(currentTaskId);
+                } else {
+                    readyTaskId = currentTaskId;
+                }
+                enableStartIfReady();
                 
                 // 加载媒体文件
                 loadMedia(file, fileType);
@@ -527,6 +569,30 @@ function initFileUpload() {
     });
 }
 
+// 加入上传文件的任务房间等待预处理完成，并在超时后允许直接开始转录
+function watchUpload(taskId) {
+    if (socket && socket.connected) {
+        socket.emit('watch_upload', { task_id: taskId });
+    }
+    
+    clearTimeout(uploadReadyTimer);
+    uploadReadyTimer = setTimeout(() => {
+        if (currentTaskId === taskId && readyTaskId !== taskId) {
+            debugLog(`等待预处理完成通知超时: task_id=${taskId}`, 'warn');
+            readyTaskId = taskId;
+            enableStartIfReady();
+        }
+    }, UPLOAD_READY_TIMEOUT);
+}
+
+// 上传的文件预处理完成后才允许开始转录
+function enableStartIfReady() {
+    if (currentTaskId && currentTaskId === readyTaskId) {
+        updateStatus('文件已就绪，可以开始转录', 'success');
+        elements.startBtn.disabled = false;
+    }
+}
+
 // 加载媒体文件
 function loadMedia(file, fileType) {
     const url = URL.createObjectURL(file);
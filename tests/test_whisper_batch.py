@@ -0,0 +1,89 @@
+"""
+run_whisper_batch 的进度与结果映射测试
+
+用一个模拟 whisper-cli 的脚本代替真实进程：按顺序处理每个文件，
+在 stderr 输出 "processing '<文件>'"，在 stdout 输出时间戳行，并写出 -oj 的 JSON 结果
+"""
+
+import os
+import sys
+import json
+import tempfile
+import textwrap
+import unittest
+
+from webwhisper.utils.whisper_utils import run_whisper_batch, _json_output_path
+
+FAKE_CLI = textwrap.dedent('''
+    import sys, json, os, time
+    fail_at = int(os.environ.get('FAKE_FAIL_AT', '-1'))
+    for i, path in enumerate(sys.argv[1:]):
+        if i == fail_at:
+            sys.exit(1)
+        sys.stderr.write("main: processing '%s' (16000 samples, 1.0 sec)\\n" % path)
+        sys.stderr.flush()
+        time.sleep(0.6)
+        print("[00:00:00.500 --> 00:00:01.000]  text %d" % i, flush=True)
+        with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+            json.dump({'transcription': [{
+                'timestamps': {'from': '00:00:00,000', 'to': '00:00:01,000'},
+                'offsets': {'from': 0, 'to': 1000},
+                'text': ' file %d' % i
+            }]}, f)
+''')
+
+
+class RunWhisperBatchTest(unittest.TestCase):
+    """run_whisper_batch 测试"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.script = os.path.join(self.tmp.name, 'fake_cli.py')
+        with open(self.script, 'w') as f:
+            f.write(FAKE_CLI)
+        self.paths = []
+        for name in ('a.wav', 'b.wav'):
+            path = os.path.join(self.tmp.name, name)
+            open(path, 'wb').close()
+            self.paths.append(path)
+        self.progress = [[], []]
+        self.callbacks = [
+            lambda p, m, i=i: self.progress[i].append(p) for i in range(len(self.paths))
+        ]
+    
+    def tearDown(self):
+        os.environ.pop('FAKE_FAIL_AT', None)
+        self.tmp.cleanup()
+    
+    def _run(self):
+        cmd = [sys.executable, self.script] + self.paths
+        return run_whisper_batch(cmd, self.paths, self.callbacks, durations=[1.0, 1.0])
+    
+    def test_progress_and_results_map_to_their_files(self):
+        results = self._run()
+        
+        # 每个文件的进度只报告给自己的回调
+        for i in range(len(self.paths)):
+            self.assertEqual(self.progress[i][0], 0)
+            self.assertEqual(self.progress[i][1:], [50])
+        
+        self.assertEqual([r['cancelled'] for r in results], [False, False])
+        self.assertEqual([r['segments'][0]['text'] for r in results], ['file 0', 'file 1'])
+        self.assertEqual(results[1]['text'], "[00:00:00.000 --> 00:00:01.000]  file 1")
+        
+        # JSON 结果读取后删除
+        for path in self.paths:
+            self.assertFalse(os.path.exists(_json_output_path(path)))
+    
+    def test_files_after_a_failure_have_no_result(self):
+        os.environ['FAKE_FAIL_AT'] = '1'
+        results = self._run()
+        
+        self.assertFalse(results[0]['cancelled'])
+        self.assertEqual(results[0]['segments'][0]['text'], 'file 0')
+        self.assertTrue(results[1]['cancelled'])
+        self.assertEqual(self.progress[1], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
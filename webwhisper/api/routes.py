@@ -11,10 +11,14 @@ from webwhisper.utils.logging_utils import logger
 from webwhisper.config import config
 from webwhisper.core.task_manager import task_manager
 from webwhisper.models.task import TaskStatus
+from webwhisper.api.websocket import websocket_namespace
 
 # 创建蓝图
 api = Blueprint('api', __name__)
 
+# 任务状态长轮询的最长等待时间（秒）
+_STATUS_MAX_WAIT = 30
+
 
 @api.route('/upload', methods=['POST'])
 def upload_file():
@@ -35,7 +39,23 @@ def upload_file():
     # 确保会话数据被保存
     session.modified = True
     
-    return jsonify(result)
+    # 在后台提前转换音频，完成后通过 WebSocket 通知客户端
+    future = transcriber.prepare_audio(result['file_path'])
+    client_id = request.form.get('sid')
+    if future is None or not client_id:
+        result['status'] = 'ready'
+        return jsonify(result)
+    
+    try:
+        websocket_namespace.watch_upload(result['task_id'], result['file_path'], client_id, future)
+    except Exception as e:
+        # 文件已保存，无法推送通知时让客户端直接开始转录
+        logger.error(f"注册上传完成通知失败: task_id={result['task_id']}, error={str(e)}")
+        result['status'] = 'ready'
+        return jsonify(result)
+    
+    result['status'] = 'processing'
+    return jsonify(result), 202
 
 
 @api.route('/transcribe', methods=['POST'])
@@ -60,7 +80,7 @@ def transcribe():
             'start_time': data.get('start_time'),
             'end_time': data.get('end_time'),
             'generate_srt': data.get('generate_srt', False),
-            'whisper_executable': data.get('whisper_path', config.get('whisper_executable'))
+            'whisper_executable': data.get('whisper_path', config.whisper_executable)
         }
         
         logger.info(f"转录请求: task_id={task_id}, file_path={file_path}, session={session}")
@@ -177,7 +197,7 @@ def get_subtitles():
 @api.route('/download/<filename>')
 def download_file(filename):
     """下载文件"""
-    return send_from_directory(config.get('upload_folder'), filename, as_attachment=True)
+    return send_from_directory(config.upload_folder, filename, as_attachment=True)
 
 
 @api.route('/save_config', methods=['POST'])
@@ -206,9 +226,15 @@ def check_task_status():
         logger.warning("检查任务状态请求缺少task_id")
         return jsonify({'success': False, 'error': '缺少任务ID'}), 400
     
-    task = task_manager.get_task(task_id)
+    # 长轮询：提供 wait 时，进度偏离 last_progress 或任务结束前不返回
+    wait = request.args.get('wait', type=float)
+    if wait is not None:
+        wait = min(max(wait, 0), _STATUS_MAX_WAIT)
+    last_progress = request.args.get('last_progress', type=int)
     
-    if not task:
+    task_status = transcriber.get_transcription_status(task_id, wait, last_progress)
+    
+    if not task_status.get('success', True):
         logger.warning(f"请求的任务不存在: task_id={task_id}")
         return jsonify({'success': False, 'error': '任务不存在'}), 404
     
@@ -216,10 +242,10 @@ def check_task_status():
     status_info = {
         'success': True,
         'task_id': task_id,
-        'status': task.status.value,
-        'progress': task.progress,
-        'message': task.message,
-        'is_completed': task.status == TaskStatus.COMPLETED
+        'status': task_status['status'],
+        'progress': task_status['progress'],
+        'message': task_status['message'],
+        'is_completed': task_status['status'] == TaskStatus.COMPLETED.value
     }
     
     logger.info(f"任务状态信息: {status_info}")
@@ -3,19 +3,55 @@ WebWhisper WebSocket 模块
 处理实时通信
 """
 
-import threading
 import time
 import queue
+import threading
+from collections import OrderedDict
 from flask_socketio import Namespace, emit
-from flask import request, current_app
+from flask import request
 
 from webwhisper.utils.logging_utils import logger
 from webwhisper.core.task_manager import task_manager
 from webwhisper.models.task import TaskStatus
+from webwhisper.utils.whisper_utils import get_wav_duration
+
+# 停止任务监控的哨兵，放入唤醒队列后监控立即退出
+_STOP = object()
+
+# 进度推送节流：距上次推送不足该间隔且进度变化小于阈值时暂缓推送
+_PROGRESS_MIN_INTERVAL = 0.1
+_PROGRESS_MIN_DELTA = 5
 
+# 单次广播的最大客户端数，超过时分批发送并在批次之间让出事件循环
+_BROADCAST_BATCH_SIZE = 50
+
+# 保留预处理记录的上传数上限，超过时丢弃最早的记录
+_MAX_TRACKED_UPLOADS = 256
+
+# 终止状态对应的通知事件名
+_EVENT = {
+    TaskStatus.COMPLETED: 'transcription_completed',
+    TaskStatus.ERROR: 'transcription_error',
+    TaskStatus.CANCELLED: 'transcription_cancelled'
+}
+
+
+class ClientState:
+    """客户端会话状态"""
+    
+    __slots__ = ('connected_at', 'task_id')
+    
+    def __init__(self, connected_at, task_id=None):
+        """
+        初始化客户端会话状态
+        
+        Args:
+            connected_at: 连接时间
+            task_id: 订阅的任务ID
+        """
+        self.connected_at = connected_at
+        self.task_id = task_id
 
-# 导入全局socketio实例
-from flask import current_app
 
 class WebWhisperNamespace(Namespace):
     """WebWhisper WebSocket 命名空间"""
@@ -29,9 +65,16 @@ class WebWhisperNamespace(Namespace):
         """
         super(WebWhisperNamespace, self).__init__(namespace)
         self.clients = {}  # 客户端会话字典
-        self.progress_threads = {}  # 进度线程字典
-        self.task_monitor_thread = None  # 任务监控线程
-        self.stop_monitoring = False  # 停止监控标志
+        self.subscribers = {}  # 任务ID -> (任务对象, 订阅该任务的客户端ID集合)
+        self.uploads = OrderedDict()  # 任务ID -> (文件路径, 音频转换任务)，按上传顺序排列
+        # 保护客户端记录和订阅关系，两者需要一起修改的复合操作也在该锁下完成（可重入）
+        self._state_lock = threading.RLock()
+        # 任务监控作为 SocketIO 后台任务运行，不会阻止进程退出
+        self.monitor_done = None  # 当前任务监控的退出事件
+        self.monitor_lock = threading.Lock()  # 保护监控的启动和停止
+        self.monitor_wakeups = queue.Queue()  # 监控唤醒队列，放入有变化的任务或 _STOP
+        self.last_progress_emits = {}  # 任务ID -> (上次推送时间, 上次推送进度)
+        self.delayed_wakeups = set()  # 已安排延迟唤醒的任务ID
         self.app = None  # Flask应用实例
         self.socketio = None  # SocketIO实例
         logger.info(f"WebSocket 命名空间已初始化: {namespace}")
@@ -57,116 +100,424 @@ class WebWhisperNamespace(Namespace):
         
         logger.info(f"WebSocket命名空间已初始化: {self.namespace}")
     
+    def _is_monitor_running(self):
+        """
+        全局任务监控是否在运行
+        
+        Returns:
+            bool: 是否在运行
+        """
+        return self.monitor_done is not None and not self.monitor_done.is_set()
+    
     def _start_task_monitor(self):
-        """启动全局任务监控线程"""
-        if self.task_monitor_thread is None or not self.task_monitor_thread.is_alive():
-            self.stop_monitoring = False
-            self.task_monitor_thread = threading.Thread(
-                target=self._monitor_all_tasks
-            )
-            self.task_monitor_thread.daemon = True
-            self.task_monitor_thread.start()
+        """启动全局任务监控"""
+        with self.monitor_lock:
+            if self._is_monitor_running():
+                return
+            # 每个监控任务使用独立的唤醒队列，旧监控收到 _STOP 后不会影响新监控
+            self.monitor_wakeups = queue.Queue()
+            self.monitor_done = threading.Event()
+            self.socketio.start_background_task(self._monitor_all_tasks, self.monitor_wakeups, self.monitor_done)
             logger.info("全局任务监控线程已启动")
     
-    def _monitor_all_tasks(self):
-        """监控所有任务的状态变化"""
-        logger.info("开始监控所有任务")
+    def _stop_task_monitor(self, timeout=2):
+        """
+        停止全局任务监控并等待其退出
+        
+        Args:
+            timeout: 等待退出的超时时间（秒）
+        """
+        with self.monitor_lock:
+            if self.monitor_done is None:
+                return
+            self.monitor_wakeups.put(_STOP)
+            if not self.monitor_done.wait(timeout):
+                logger.warning(f"等待全局任务监控退出超时: {timeout}秒")
+            self.monitor_done = None
+    
+    def _monitor_all_tasks(self, wakeups, done):
+        """
+        监控已订阅任务的进度和状态，由单一后台任务统一分发给所有订阅者
+        
+        Args:
+            wakeups: 唤醒队列，元素为有变化的任务对象，或 _STOP 表示退出
+            done: 退出事件，监控结束时设置
+        """
+        try:
+            self._monitor_loop(wakeups)
+        finally:
+            done.set()
+    
+    def _monitor_loop(self, wakeups):
+        """
+        任务监控主循环
         
-        last_task_statuses = {}  # 上次任务状态
+        阻塞在唤醒队列上，只在订阅的任务有变化时工作，空闲时不轮询
         
-        while not self.stop_monitoring:
+        Args:
+            wakeups: 唤醒队列，元素为有变化的任务对象，或 _STOP 表示退出
+        """
+        logger.info("开始监控所有任务")
+        
+        while True:
             try:
+                item = wakeups.get()
+                
+                # 合并已积压的唤醒，同一任务本轮只分发一次
+                changed = {}
+                while item is not _STOP:
+                    changed[item.task_id] = item
+                    try:
+                        item = wakeups.get_nowait()
+                    except queue.Empty:
+                        break
+                
+                if item is _STOP:
+                    logger.info("任务监控收到停止信号")
+                    return
+                
                 # 创建应用上下文
                 if self.app:
                     with self.app.app_context():
-                        # 获取所有任务
-                        tasks = task_manager.get_all_tasks()
-                        
-                        # 检查每个任务的状态
-                        for task_id, task in tasks.items():
-                            # 如果任务状态发生变化，记录并广播
-                            if task_id not in last_task_statuses or last_task_statuses[task_id] != task.status:
-                                logger.info(f"任务状态变化: task_id={task_id}, status={task.status}, progress={task.progress}")
-                                last_task_statuses[task_id] = task.status
-                                
-                                # 如果任务完成，广播完成通知
-                                if task.status == TaskStatus.COMPLETED:
-                                    logger.info(f"任务完成，广播完成通知: task_id={task_id}")
-                                    try:
-                                        if self.socketio:
-                                            self.socketio.emit('transcription_completed', {
-                                                'task_id': task_id,
-                                                'text': task.result.get('text', ''),
-                                                'has_segments': len(task.result.get('segments', [])) > 0
-                                            }, namespace='/')
-                                            logger.debug(f"完成通知已广播: task_id={task_id}")
-                                        else:
-                                            logger.warning(f"socketio实例为None，无法广播完成通知: task_id={task_id}")
-                                    except Exception as e:
-                                        logger.error(f"广播完成通知失败: task_id={task_id}, error={str(e)}")
-                                
-                                # 如果任务失败，广播错误通知
-                                elif task.status == TaskStatus.ERROR:
-                                    logger.info(f"任务失败，广播错误通知: task_id={task_id}, error={task.error}")
-                                    try:
-                                        if self.socketio:
-                                            self.socketio.emit('transcription_error', {
-                                                'task_id': task_id,
-                                                'error': task.error
-                                            }, namespace='/')
-                                            logger.debug(f"错误通知已广播: task_id={task_id}")
-                                        else:
-                                            logger.warning(f"socketio实例为None，无法广播错误通知: task_id={task_id}")
-                                    except Exception as e:
-                                        logger.error(f"广播错误通知失败: task_id={task_id}, error={str(e)}")
-                                
-                                # 如果任务取消，广播取消通知
-                                elif task.status == TaskStatus.CANCELLED:
-                                    logger.info(f"任务取消，广播取消通知: task_id={task_id}")
-                                    try:
-                                        if self.socketio:
-                                            self.socketio.emit('transcription_cancelled', {
-                                                'task_id': task_id
-                                            }, namespace='/')
-                                            logger.debug(f"取消通知已广播: task_id={task_id}")
-                                        else:
-                                            logger.warning(f"socketio实例为None，无法广播取消通知: task_id={task_id}")
-                                    except Exception as e:
-                                        logger.error(f"广播取消通知失败: task_id={task_id}, error={str(e)}")
+                        for task_id in changed:
+                            # 只分发仍有订阅者的任务
+                            with self._state_lock:
+                                entry = self.subscribers.get(task_id)
+                                client_ids = list(entry[1]) if entry else None
+                            if not client_ids:
+                                continue
                             
-                            # 如果任务正在进行中，检查进度队列并广播进度
-                            if task.status == TaskStatus.RUNNING:
-                                try:
-                                    # 非阻塞方式获取进度
-                                    try:
-                                        progress_data = task.progress_queue.get_nowait()
-                                        logger.debug(f"获取到进度更新: task_id={task_id}, progress={progress_data}")
-                                        try:
-                                            if self.socketio:
-                                                self.socketio.emit('progress_update', {
-                                                    'task_id': task_id,
-                                                    'progress': progress_data['progress'],
-                                                    'message': progress_data['message']
-                                                }, namespace='/')
-                                                logger.debug(f"进度更新已广播: task_id={task_id}, progress={progress_data['progress']}")
-                                            else:
-                                                logger.warning(f"socketio实例为None，无法广播进度更新: task_id={task_id}")
-                                        except Exception as e:
-                                            logger.error(f"广播进度更新失败: task_id={task_id}, error={str(e)}")
-                                    except queue.Empty:
-                                        # 队列为空，继续检查下一个任务
-                                        pass
-                                except Exception as e:
-                                    logger.error(f"检查任务进度失败: task_id={task_id}, error={str(e)}")
+                            try:
+                                self._dispatch_task(entry[0], client_ids)
+                            except Exception as e:
+                                logger.error("分发任务进度失败: task_id=%s, error=%s", task_id, e)
                 else:
                     logger.warning("应用实例未设置，无法创建应用上下文")
-                
-                # 短暂休眠，避免过度消耗CPU
-                time.sleep(0.5)
             
             except Exception as e:
-                logger.error(f"全局任务监控线程异常: {str(e)}")
-                time.sleep(1)  # 出错后稍微延长休眠时间
+                logger.error("全局任务监控线程异常: %s", e)
+    
+    def _on_task_change(self, task):
+        """
+        任务观察者回调，在任务进度或状态变化时唤醒监控
+        
+        Args:
+            task: 任务对象
+        """
+        self.monitor_wakeups.put(task)
+    
+    def _dispatch_task(self, task, client_ids):
+        """
+        读取任务的最新进度并发送给所有订阅者，任务结束时发送最终通知并清除订阅
+        
+        Args:
+            task: 任务对象（订阅时缓存，无需每轮重新查询任务管理器）
+            client_ids: 订阅该任务的客户端ID列表
+        """
+        task_id = task.task_id
+        
+        # 读取最新进度，两次分发之间的多次更新只发送最后一次
+        # 进度变化过快时暂不读取，到期后再唤醒分发，保证最后一次进度不会丢失
+        progress_data = task.peek_progress()
+        if progress_data is not None and not task.is_terminal():
+            delay = self._progress_throttle_delay(task_id, progress_data['progress'])
+            if delay > 0:
+                self._schedule_wakeup(task, delay)
+                progress_data = None
+        if progress_data is not None:
+            progress_data = task.drain_progress()
+        
+        # 通过任务房间发送，负载只编码一次
+        room = self._task_room(task_id)
+        
+        if progress_data is not None:
+            self.last_progress_emits[task_id] = (time.monotonic(), progress_data['progress'])
+            # 使用惰性格式化，非调试级别下不构造日志字符串
+            logger.debug("获取到进度更新: task_id=%s, progress=%s", task_id, progress_data)
+            self._broadcast_batched('progress_update', progress_data, room, client_ids)
+        
+        if not task.is_terminal():
+            return
+        
+        # 任务结束，发送最终通知
+        status = task.status
+        event = _EVENT[status]
+        payload = task.terminal_payload
+        
+        logger.debug("任务状态变化: task_id=%s, status=%s, 通知订阅者: %d", task_id, status, len(client_ids))
+        self._broadcast_batched(event, payload, room, client_ids)
+        
+        self.close_room(room)
+        self._clear_subscribers(task_id)
+    
+    def _progress_throttle_delay(self, task_id, progress):
+        """
+        计算进度推送还需等待的时间
+        
+        开始和结束的进度、变化达到阈值的进度立即推送，其余进度与上次推送至少间隔 _PROGRESS_MIN_INTERVAL
+        
+        Args:
+            task_id: 任务ID
+            progress: 待推送的进度
+        
+        Returns:
+            float: 需等待的秒数，0 表示立即推送
+        """
+        last = self.last_progress_emits.get(task_id)
+        if last is None or progress in (0, 100) or abs(progress - last[1]) >= _PROGRESS_MIN_DELTA:
+            return 0
+        return max(0, last[0] + _PROGRESS_MIN_INTERVAL - time.monotonic())
+    
+    def _schedule_wakeup(self, task, delay):
+        """
+        延迟唤醒监控以推送被节流的进度，同一任务同时只安排一次
+        
+        Args:
+            task: 任务对象
+            delay: 延迟秒数
+        """
+        if task.task_id in self.delayed_wakeups:
+            return
+        self.delayed_wakeups.add(task.task_id)
+        
+        def wake():
+            self.socketio.sleep(delay)
+            self.delayed_wakeups.discard(task.task_id)
+            self._on_task_change(task)
+        
+        self.socketio.start_background_task(wake)
+    
+    def _broadcast_batched(self, event, payload, room, client_ids, batch_size=_BROADCAST_BATCH_SIZE):
+        """
+        向任务订阅者广播事件，订阅者较多时分批发送
+        
+        订阅者不超过 batch_size 时直接向房间发送一次；否则按客户端列表分批发送，
+        后续批次作为后台任务调度，使事件循环在批次之间可以处理其他连接
+        
+        Args:
+            event: 事件名
+            payload: 事件负载，所有批次共用
+            room: 任务房间名
+            client_ids: 订阅者客户端ID列表
+            batch_size: 每批的客户端数
+        """
+        # 订阅者都连接在本进程时直接发送，配置了消息队列也不经过队列转发
+        with self._state_lock:
+            ignore_queue = all(client_id in self.clients for client_id in client_ids)
+        
+        if len(client_ids) <= batch_size:
+            try:
+                self.socketio.emit(event, payload, room=room, namespace=self.namespace,
+                                   ignore_queue=ignore_queue)
+            except Exception as e:
+                logger.error("广播%s失败: room=%s, error=%s", event, room, e)
+            return
+        
+        batches = [client_ids[i:i + batch_size] for i in range(0, len(client_ids), batch_size)]
+        
+        def send_batch(index):
+            try:
+                self.socketio.emit(event, payload, room=batches[index], namespace=self.namespace,
+                                   ignore_queue=ignore_queue)
+            except Exception as e:
+                logger.error("分批发送%s失败: room=%s, batch=%d, error=%s", event, room, index, e)
+            if index + 1 < len(batches):
+                self.socketio.start_background_task(send_batch, index + 1)
+        
+        send_batch(0)
+    
+    def _send(self, event, payload, client_id=None):
+        """
+        向单个客户端发送事件
+        
+        有 SocketIO 实例时按客户端ID发送，否则使用当前请求上下文的 emit
+        
+        Args:
+            event: 事件名
+            payload: 事件负载
+            client_id: 客户端ID
+        """
+        if self.socketio:
+            self.socketio.emit(event, payload, room=client_id)
+        else:
+            emit(event, payload)
+    
+    def _safe_emit(self, event, payload, client_id=None):
+        """
+        向单个客户端发送事件，发送失败时只记录日志
+        
+        Args:
+            event: 事件名
+            payload: 事件负载
+            client_id: 客户端ID
+        """
+        try:
+            self._send(event, payload, client_id)
+        except Exception as e:
+            logger.error("发送%s失败: client_id=%s, error=%s", event, client_id, e)
+    
+    @staticmethod
+    def _task_room(task_id):
+        """
+        获取任务的房间名
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            str: 房间名
+        """
+        return f"task:{task_id}"
+    
+    def _add_subscriber(self, client_id, task):
+        """
+        将客户端加入任务的订阅者集合
+        
+        Args:
+            client_id: 客户端ID
+            task: 任务对象
+        
+        Returns:
+            bool: 是否是该任务的第一个订阅者
+        """
+        with self._state_lock:
+            entry = self.subscribers.get(task.task_id)
+            if entry is not None:
+                entry[1].add(client_id)
+                return False
+            self.subscribers[task.task_id] = (task, {client_id})
+        
+        # 第一个订阅者加入时开始观察任务，并立即唤醒一次，
+        # 以免任务在注册观察者之前已经结束而错过通知
+        task.add_observer(self._on_task_change)
+        self._on_task_change(task)
+        return True
+    
+    def _discard_pending_progress(self, task):
+        """
+        丢弃任务尚未读取的进度
+        
+        Args:
+            task: 任务对象
+        """
+        task.drain_progress()
+    
+    def _remove_subscriber(self, client_id, task_id):
+        """
+        将客户端从任务的订阅者集合中移除
+        
+        Args:
+            client_id: 客户端ID
+            task_id: 任务ID
+        """
+        with self._state_lock:
+            entry = self.subscribers.get(task_id)
+            if entry is None:
+                return
+            entry[1].discard(client_id)
+            if entry[1]:
+                return
+            del self.subscribers[task_id]
+        
+        entry[0].remove_observer(self._on_task_change)
+        self.last_progress_emits.pop(task_id, None)
+    
+    def _clear_subscribers(self, task_id):
+        """
+        清除任务的所有订阅者
+        
+        Args:
+            task_id: 任务ID
+        """
+        with self._state_lock:
+            entry = self.subscribers.pop(task_id, None)
+        
+        if entry is not None:
+            entry[0].remove_observer(self._on_task_change)
+        self.last_progress_emits.pop(task_id, None)
+    
+    def watch_upload(self, task_id, file_path, client_id, future):
+        """
+        等待上传文件的后台预处理完成，并向任务房间推送 upload_ready
+        
+        客户端通过 watch_upload 事件加入任务房间，重连后重新加入即可收到通知，不依赖上传时的客户端ID
+        
+        Args:
+            task_id: 任务ID
+            file_path: 文件路径
+            client_id: 上传文件的客户端ID，为空时等待客户端自行加入房间
+            future: 音频转换任务
+        """
+        if not self.socketio:
+            logger.warning(f"socketio实例为None，无法推送上传完成通知: task_id={task_id}")
+            return
+        
+        room = self._task_room(task_id)
+        if client_id:
+            self._join_upload_room(client_id, room)
+        
+        # 记录预处理任务，供重连后重新加入房间的客户端补发结果
+        with self._state_lock:
+            self.uploads[task_id] = (file_path, future)
+            self.uploads.move_to_end(task_id)
+            while len(self.uploads) > _MAX_TRACKED_UPLOADS:
+                self.uploads.popitem(last=False)
+        
+        def on_done(done_future):
+            event, payload = self._upload_result(task_id, file_path, done_future)
+            if event == 'upload_ready':
+                logger.info(f"上传文件预处理完成: task_id={task_id}")
+            else:
+                logger.error(f"上传文件预处理失败: task_id={task_id}, error={payload['error']}")
+            try:
+                self.socketio.emit(event, payload, room=room, namespace=self.namespace)
+            except Exception as e:
+                logger.error(f"发送{event}通知失败: task_id={task_id}, error={str(e)}")
+        
+        future.add_done_callback(on_done)
+    
+    def _join_upload_room(self, client_id, room):
+        """
+        将上传文件的客户端加入任务房间
+        
+        客户端ID来自上传表单，上传期间重连后已经失效；此时不加入房间，由客户端之后发送的 watch_upload 事件加入
+        
+        Args:
+            client_id: 上传表单中的客户端ID
+            room: 任务房间名
+        """
+        with self._state_lock:
+            connected = client_id in self.clients
+        if not connected:
+            logger.info(f"上传时的客户端已断开，等待客户端重新加入房间: client_id={client_id}, room={room}")
+            return
+        try:
+            self.enter_room(client_id, room)
+        except Exception as e:
+            logger.warning(f"加入任务房间失败: client_id={client_id}, room={room}, error={str(e)}")
+    
+    @staticmethod
+    def _upload_result(task_id, file_path, future):
+        """
+        根据已完成的预处理任务生成通知
+        
+        Args:
+            task_id: 任务ID
+            file_path: 文件路径
+            future: 已完成的音频转换任务
+        
+        Returns:
+            tuple: (事件名, 负载)
+        """
+        try:
+            wav_path = future.result()
+            return 'upload_ready', {
+                'task_id': task_id,
+                'file_path': file_path,
+                'duration': get_wav_duration(wav_path)
+            }
+        except Exception as e:
+            return 'upload_error', {'task_id': task_id, 'error': str(e)}
     
     def on_connect(self, auth=None):
         """
@@ -176,45 +527,39 @@ class WebWhisperNamespace(Namespace):
             auth: 认证信息（Flask-SocketIO 4.x 版本需要）
         """
         client_id = request.sid
-        self.clients[client_id] = {
-            'connected_at': time.time(),
-            'task_id': None
-        }
+        with self._state_lock:
+            self.clients[client_id] = ClientState(time.time())
         logger.info(f"客户端已连接: {client_id}, 当前客户端数: {len(self.clients)}")
         
         # 发送连接响应
-        if self.socketio:
-            self.socketio.emit('connect_response', {'status': 'connected', 'client_id': client_id}, room=client_id)
-        else:
-            emit('connect_response', {'status': 'connected', 'client_id': client_id})
+        self._safe_emit('connect_response', {'status': 'connected', 'client_id': client_id}, client_id)
         
         # 确保全局任务监控线程正在运行
-        if self.task_monitor_thread is None or not self.task_monitor_thread.is_alive():
+        if not self._is_monitor_running():
             logger.warning("全局任务监控线程不在运行状态，重新启动")
             self._start_task_monitor()
     
     def on_disconnect(self):
         """处理客户端断开连接"""
         client_id = request.sid
-        if client_id in self.clients:
-            task_id = self.clients[client_id].get('task_id')
+        # 取出并删除客户端记录，同时取消任务订阅，避免与并发的订阅请求交错
+        with self._state_lock:
+            client = self.clients.pop(client_id, None)
+            task_id = client.task_id if client is not None else None
+            if task_id:
+                self._remove_subscriber(client_id, task_id)
+        
+        if client is not None:
             logger.info(f"客户端断开连接: {client_id}, 关联任务ID: {task_id}")
+            if task_id:
+                self.leave_room(client_id, self._task_room(task_id))
             
-            # 停止进度线程
-            if client_id in self.progress_threads:
-                logger.debug(f"停止客户端 {client_id} 的进度监控线程")
-                self.progress_threads[client_id]['stop'] = True
-                del self.progress_threads[client_id]
-            
-            # 删除客户端记录
-            del self.clients[client_id]
             logger.info(f"客户端记录已清理: {client_id}, 剩余客户端数: {len(self.clients)}")
             
             # 如果没有客户端连接，可以考虑停止全局监控线程
-            if not self.clients and self.task_monitor_thread is not None:
+            if not self.clients and self.monitor_done is not None:
                 logger.info("没有客户端连接，停止全局任务监控线程")
-                self.stop_monitoring = True
-                self.task_monitor_thread = None
+                self._stop_task_monitor()
     
     def on_subscribe_task(self, data):
         """
@@ -226,277 +571,115 @@ class WebWhisperNamespace(Namespace):
         try:
             client_id = request.sid
             task_id = data.get('task_id')
-            logger.info(f"收到任务订阅请求: client_id={client_id}, task_id={task_id}, data={data}")
+            logger.debug("收到任务订阅请求: client_id=%s, task_id=%s, data=%s", client_id, task_id, data)
             
             if not task_id:
                 logger.warning(f"无效的任务ID: {task_id}")
-                if self.socketio:
-                    self.socketio.emit('error', {'message': '无效的任务ID'}, room=client_id)
-                else:
-                    emit('error', {'message': '无效的任务ID'})
+                self._safe_emit('error', {'message': '无效的任务ID'}, client_id)
                 return
             
             # 获取任务
             task = task_manager.get_task(task_id)
             if not task:
                 logger.warning(f"任务不存在: {task_id}")
-                if self.socketio:
-                    self.socketio.emit('error', {'message': '任务不存在'}, room=client_id)
-                else:
-                    emit('error', {'message': '任务不存在'})
+                self._safe_emit('error', {'message': '任务不存在'}, client_id)
                 return
             
-            # 更新客户端记录
-            self.clients[client_id]['task_id'] = task_id
-            logger.info(f"已更新客户端任务关联: client_id={client_id}, task_id={task_id}")
+            # 更新客户端记录，一个客户端只订阅一个任务；任务已开始转录，不再需要预处理记录
+            with self._state_lock:
+                self.uploads.pop(task_id, None)
+                client = self.clients.get(client_id)
+                if client is None:
+                    # 客户端已断开，订阅请求与断开连接并发到达
+                    logger.warning(f"客户端已断开，忽略订阅请求: client_id={client_id}, task_id={task_id}")
+                    return
+                old_task_id = client.task_id
+                if old_task_id and old_task_id != task_id:
+                    self._remove_subscriber(client_id, old_task_id)
+                client.task_id = task_id
+            if old_task_id and old_task_id != task_id:
+                self.leave_room(client_id, self._task_room(old_task_id))
+            logger.debug("已更新客户端任务关联: client_id=%s, task_id=%s", client_id, task_id)
             
-            # 如果任务已完成，直接发送完成通知
-            if task.status == TaskStatus.COMPLETED:
-                logger.info(f"任务已完成，直接发送完成通知: task_id={task_id}")
-                try:
-                    if self.socketio:
-                        self.socketio.emit('transcription_completed', {
-                            'task_id': task_id,
-                            'text': task.result.get('text', ''),
-                            'has_segments': len(task.result.get('segments', [])) > 0
-                        }, room=client_id)
-                    else:
-                        emit('transcription_completed', {
-                            'task_id': task_id,
-                            'text': task.result.get('text', ''),
-                            'has_segments': len(task.result.get('segments', [])) > 0
-                        })
-                    logger.debug(f"完成通知已发送: task_id={task_id}")
-                except Exception as e:
-                    logger.error(f"发送完成通知失败: task_id={task_id}, error={str(e)}")
+            # 如果任务已结束（完成、失败或取消），直接发送最终通知
+            # 以终止事件为准，保证终止负载已经生成
+            if task.is_terminal():
+                event = _EVENT[task.status]
+                logger.info(f"任务已结束，直接发送{event}通知: task_id={task_id}")
+                self._safe_emit(event, task.terminal_payload, client_id)
                 return
             
-            # 如果任务已失败，直接发送错误通知
-            if task.status == TaskStatus.ERROR:
-                logger.info(f"任务已失败，直接发送错误通知: task_id={task_id}, error={task.error}")
-                try:
-                    if self.socketio:
-                        self.socketio.emit('transcription_error', {
-                            'task_id': task_id,
-                            'error': task.error
-                        }, room=client_id)
-                    else:
-                        emit('transcription_error', {
-                            'task_id': task_id,
-                            'error': task.error
-                        })
-                    logger.debug(f"错误通知已发送: task_id={task_id}")
-                except Exception as e:
-                    logger.error(f"发送错误通知失败: task_id={task_id}, error={str(e)}")
-                return
+            # 加入订阅者集合，后续进度由全局监控统一分发
+            # 第一个订阅者加入前积压的进度已过时，直接丢弃，当前进度随后单独发送
+            # 先加入房间再登记订阅，保证登记后触发的首次分发能送达该客户端
+            self.enter_room(client_id, self._task_room(task_id))
+            with self._state_lock:
+                if client_id not in self.clients:
+                    return
+                first_subscriber = self._add_subscriber(client_id, task)
+            if first_subscriber:
+                self._discard_pending_progress(task)
             
-            # 如果任务已取消，直接发送取消通知
-            if task.status == TaskStatus.CANCELLED:
-                logger.info(f"任务已取消，直接发送取消通知: task_id={task_id}")
-                try:
-                    if self.socketio:
-                        self.socketio.emit('transcription_cancelled', {
-                            'task_id': task_id
-                        }, room=client_id)
-                    else:
-                        emit('transcription_cancelled', {
-                            'task_id': task_id
-                        })
-                    logger.debug(f"取消通知已发送: task_id={task_id}")
-                except Exception as e:
-                    logger.error(f"发送取消通知失败: task_id={task_id}, error={str(e)}")
-                return
-            
-            # 发送当前进度
-            try:
-                if self.socketio:
-                    self.socketio.emit('progress_update', {
-                        'task_id': task_id,
-                        'progress': task.progress,
-                        'message': task.message
-                    }, room=client_id)
-                else:
-                    emit('progress_update', {
-                        'task_id': task_id,
-                        'progress': task.progress,
-                        'message': task.message
-                    })
-                logger.debug(f"初始进度已发送: task_id={task_id}, progress={task.progress}")
-            except Exception as e:
-                logger.error(f"发送初始进度失败: task_id={task_id}, error={str(e)}")
-            
-            # 发送订阅确认
-            try:
-                if self.socketio:
-                    self.socketio.emit('subscription_confirmed', {'task_id': task_id}, room=client_id)
-                else:
-                    emit('subscription_confirmed', {'task_id': task_id})
-                logger.info(f"订阅确认已发送: client_id={client_id}, task_id={task_id}")
-            except Exception as e:
-                logger.error(f"发送订阅确认失败: client_id={client_id}, task_id={task_id}, error={str(e)}")
+            # 发送当前进度和订阅确认
+            self._safe_emit('progress_update', {
+                'task_id': task_id,
+                'progress': task.progress,
+                'message': task.message
+            }, client_id)
+            self._safe_emit('subscription_confirmed', {'task_id': task_id}, client_id)
         
         except Exception as e:
             logger.error(f"处理订阅请求时发生错误: client_id={request.sid}, error={str(e)}")
-            try:
-                if self.socketio:
-                    self.socketio.emit('error', {'message': '订阅失败，请重试'}, room=request.sid)
-                else:
-                    emit('error', {'message': '订阅失败，请重试'})
-            except Exception as e2:
-                logger.error(f"发送错误通知失败: error={str(e2)}")
+            self._safe_emit('error', {'message': '订阅失败，请重试'}, request.sid)
     
-    def on_unsubscribe_task(self, data):
+    def on_watch_upload(self, data):
         """
-        取消订阅任务进度
+        加入上传文件的任务房间，等待预处理完成通知；预处理已结束时直接补发结果
         
         Args:
             data: 包含任务ID的字典
         """
         client_id = request.sid
-        logger.info(f"收到取消订阅请求: client_id={client_id}")
+        task_id = data.get('task_id')
+        if not task_id:
+            return
         
-        # 停止进度线程
-        if client_id in self.progress_threads:
-            logger.debug(f"停止进度监控线程: client_id={client_id}")
-            self.progress_threads[client_id]['stop'] = True
-            del self.progress_threads[client_id]
-        
-        # 更新客户端记录
-        if client_id in self.clients:
-            old_task_id = self.clients[client_id].get('task_id')
-            self.clients[client_id]['task_id'] = None
-            logger.info(f"已清除客户端任务关联: client_id={client_id}, old_task_id={old_task_id}")
+        with self._state_lock:
+            entry = self.uploads.get(task_id)
+        if entry is None:
+            # 没有预处理记录时让客户端直接开始转录，转录时会同步转换音频
+            self._safe_emit('upload_error', {'task_id': task_id, 'error': '预处理记录不存在'}, client_id)
+            return
+        
+        self.enter_room(client_id, self._task_room(task_id))
+        file_path, future = entry
+        if future.done():
+            event, payload = self._upload_result(task_id, file_path, future)
+            self._safe_emit(event, payload, client_id)
     
-    def _monitor_progress(self, client_id, task_id):
+    def on_unsubscribe_task(self, data):
         """
-        监控任务进度
+        取消订阅任务进度
         
         Args:
-            client_id: 客户端ID
-            task_id: 任务ID
+            data: 包含任务ID的字典
         """
-        logger.info(f"开始监控任务进度: client_id={client_id}, task_id={task_id}")
+        client_id = request.sid
+        logger.info(f"收到取消订阅请求: client_id={client_id}")
         
-        try:
-            # 获取任务
-            task = task_manager.get_task(task_id)
-            if not task:
-                logger.warning(f"任务不存在，停止监控: task_id={task_id}")
+        # 更新客户端记录并取消任务订阅
+        with self._state_lock:
+            client = self.clients.get(client_id)
+            if client is None:
                 return
-            
-            logger.info(f"任务初始状态: task_id={task_id}, status={task.status}, progress={task.progress}")
-            
-            # 监控进度队列
-            poll_count = 0
-            last_progress = -1
-            
-            while client_id in self.clients and client_id in self.progress_threads:
-                poll_count += 1
-                
-                # 每10次轮询记录一次日志
-                if poll_count % 10 == 0:
-                    logger.debug(f"进度监控轮询中: client_id={client_id}, task_id={task_id}, poll_count={poll_count}")
-                
-                # 检查是否应该停止
-                if self.progress_threads[client_id]['stop']:
-                    logger.info(f"收到停止信号，结束监控: client_id={client_id}, task_id={task_id}")
-                    break
-                
-                # 检查任务状态
-                task = task_manager.get_task(task_id)
-                if not task:
-                    logger.warning(f"任务不存在，停止监控: task_id={task_id}")
-                    break
-                
-                # 如果进度有变化，记录日志
-                if task.progress != last_progress:
-                    logger.info(f"任务进度更新: task_id={task_id}, status={task.status}, progress={task.progress}, message={task.message}")
-                    last_progress = task.progress
-                
-                # 在应用上下文中执行
-                if self.app:
-                    with self.app.app_context():
-                        # 如果任务已完成，发送完成通知
-                        if task.status == TaskStatus.COMPLETED:
-                            logger.info(f"任务完成，发送完成通知: task_id={task_id}")
-                            try:
-                                if self.socketio:
-                                    self.socketio.emit('transcription_completed', {
-                                        'task_id': task_id,
-                                        'text': task.result.get('text', ''),
-                                        'has_segments': len(task.result.get('segments', [])) > 0
-                                    }, namespace='/', room=client_id)
-                                    logger.debug(f"完成通知已发送: task_id={task_id}")
-                                else:
-                                    logger.warning(f"socketio实例为None，无法发送完成通知: task_id={task_id}")
-                            except Exception as e:
-                                logger.error(f"发送完成通知失败: task_id={task_id}, error={str(e)}")
-                            break
-                        
-                        # 如果任务已失败，发送错误通知
-                        if task.status == TaskStatus.ERROR:
-                            logger.info(f"任务失败，发送错误通知: task_id={task_id}, error={task.error}")
-                            try:
-                                if self.socketio:
-                                    self.socketio.emit('transcription_error', {
-                                        'task_id': task_id,
-                                        'error': task.error
-                                    }, namespace='/', room=client_id)
-                                    logger.debug(f"错误通知已发送: task_id={task_id}")
-                                else:
-                                    logger.warning(f"socketio实例为None，无法发送错误通知: task_id={task_id}")
-                            except Exception as e:
-                                logger.error(f"发送错误通知失败: task_id={task_id}, error={str(e)}")
-                            break
-                        
-                        # 如果任务已取消，发送取消通知
-                        if task.status == TaskStatus.CANCELLED:
-                            logger.info(f"任务取消，发送取消通知: task_id={task_id}")
-                            try:
-                                if self.socketio:
-                                    self.socketio.emit('transcription_cancelled', {
-                                        'task_id': task_id
-                                    }, namespace='/', room=client_id)
-                                    logger.debug(f"取消通知已发送: task_id={task_id}")
-                                else:
-                                    logger.warning(f"socketio实例为None，无法发送取消通知: task_id={task_id}")
-                            except Exception as e:
-                                logger.error(f"发送取消通知失败: task_id={task_id}, error={str(e)}")
-                            break
-                        
-                        # 尝试从队列获取进度更新
-                        try:
-                            progress_data = task.progress_queue.get(timeout=0.5)
-                            logger.debug(f"获取到进度更新: task_id={task_id}, progress={progress_data}")
-                            try:
-                                if self.socketio:
-                                    self.socketio.emit('progress_update', {
-                                        'task_id': task_id,
-                                        'progress': progress_data['progress'],
-                                        'message': progress_data['message']
-                                    }, namespace='/', room=client_id)
-                                    logger.debug(f"进度更新已发送: task_id={task_id}, progress={progress_data['progress']}")
-                                else:
-                                    logger.warning(f"socketio实例为None，无法发送进度更新: task_id={task_id}")
-                            except Exception as e:
-                                logger.error(f"发送进度更新失败: task_id={task_id}, error={str(e)}")
-                        except queue.Empty:
-                            # 队列为空，继续等待
-                            pass
-                else:
-                    logger.warning(f"应用实例未设置，无法创建应用上下文: client_id={client_id}, task_id={task_id}")
-                
-                # 短暂休眠，避免过度消耗CPU
-                time.sleep(0.1)
+            old_task_id = client.task_id
+            client.task_id = None
+            if old_task_id:
+                self._remove_subscriber(client_id, old_task_id)
         
-        except Exception as e:
-            logger.error(f"监控进度线程异常: client_id={client_id}, task_id={task_id}, error={str(e)}")
-        
-        finally:
-            # 清理线程记录
-            if client_id in self.progress_threads:
-                del self.progress_threads[client_id]
-                logger.info(f"进度监控线程已清理: client_id={client_id}, task_id={task_id}")
+        if old_task_id:
+            self.leave_room(client_id, self._task_room(old_task_id))
+        logger.info(f"已清除客户端任务关联: client_id={client_id}, old_task_id={old_task_id}")
 
 
 # 导出 WebSocket 命名空间
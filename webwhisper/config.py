@@ -6,13 +6,91 @@ WebWhisper 配置管理模块
 import os
 import json
 import logging
+import threading
 from pathlib import Path
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时使用标准库 json
+    orjson = None
 
 from pycore.utils.file_utils import FileUtils
 
 # 基础路径
 CONFIG_FILE = FileUtils.get_project_path('web_config.json')
 
+# 本进程已确保存在的目录，避免重复的 stat/mkdir 系统调用
+_ENSURED_DIRS = set()
+
+
+def ensure_dir(path):
+    """
+    确保目录存在，同一进程内每个目录只创建一次
+    
+    Args:
+        path: 目录路径
+    """
+    path = str(path)
+    if path in _ENSURED_DIRS:
+        return
+    os.makedirs(path, exist_ok=True)
+    _ENSURED_DIRS.add(path)
+
+
+def _json_default(value):
+    """集合类型的配置序列化为有序列表，路径序列化为字符串"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"无法序列化的配置值: {type(value).__name__}")
+
+
+def _loads(data):
+    """
+    解析 JSON，优先使用 orjson
+    
+    Args:
+        data: JSON 内容（bytes 或 str）
+    
+    Returns:
+        解析后的对象
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dump_json(data):
+    """
+    将对象序列化为 JSON
+    
+    写入配置文件只在保存时发生，统一使用标准库 json 的 4 空格缩进，
+    输出格式不随是否安装 orjson 而变化
+    
+    Args:
+        data: 要序列化的对象
+    
+    Returns:
+        bytes: JSON 内容
+    """
+    return json.dumps(data, indent=4, default=_json_default).encode('utf-8')
+
+
+def _write_atomic(path, content):
+    """
+    原子地写入文件：先写临时文件再替换，写入中途崩溃不会破坏原文件
+    
+    Args:
+        path: 文件路径（Path）
+        content: 文件内容（bytes）
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
 # 默认配置
 DEFAULT_CONFIG = {
     'beam_size': 5,
@@ -21,7 +99,7 @@ DEFAULT_CONFIG = {
     'temp_folder': FileUtils.get_project_path('temp'),
     'models_folder': FileUtils.get_project_path('models/whisper'),
     'max_upload_size': 500 * 1024 * 1024,  # 500MB
-    'allowed_extensions': {'wav', 'mp3', 'm4a', 'flac', 'ogg', 'wma', 'mp4', 'mov', 'avi', 'mkv'},
+    'allowed_extensions': frozenset({'wav', 'mp3', 'm4a', 'flac', 'ogg', 'wma', 'mp4', 'mov', 'avi', 'mkv'}),
     'allowed_models': [
         "ggml-tiny.bin", "ggml-tiny.en.bin",
         "ggml-base.bin", "ggml-base.en.bin",
@@ -33,7 +111,14 @@ DEFAULT_CONFIG = {
     'host': '0.0.0.0',
     'port': 5000,
     'debug': True,
-    'cleanup_temp_files': False  # 默认不删除临时文件
+    'verbose_logging': False,  # 输出 SocketIO/EngineIO 帧日志和服务器请求日志
+    'cleanup_temp_files': False,  # 默认不删除临时文件
+    'model_quantization': '',  # 量化模型后缀，如 'q5_0'、'q8_0'，为空则使用原始模型
+    'whisper_processors': 1,  # whisper.cpp 并行处理的分片数 (-p)
+    'whisper_threads': 0,  # whisper.cpp 每个分片的线程数 (-t)，0 表示按 CPU 核数自动计算
+    'max_concurrent_transcriptions': 0,  # 同时运行的转录任务数，0 表示 CPU 核数的一半
+    'max_batch_files': 1,  # 排队中选项相同的任务合并为一次 whisper 调用的最大文件数，默认 1 不合并；合并后所有任务要等最后一个文件转录完才一起完成
+    'persistent_workers': False  # 使用常驻的 whisper-server 进程，模型只加载一次
 }
 
 
@@ -41,69 +126,130 @@ class Config:
     """配置管理类"""
     _instance = None
     _config = None
+    _view = None  # 配置字典的只读视图，随配置变更自动反映最新值
+    _dirty = False  # 配置自加载或上次保存后是否被修改
+    _saved_digest = None  # 上次加载或保存时配置内容的哈希，内容未变时跳过写入
+    _default_whisper_path = None  # 默认 whisper 可执行文件路径（Path），只检测一次
+    _loaded = False  # 配置是否已加载
+    _load_lock = threading.Lock()  # 保证配置只加载一次
 
     def __new__(cls):
-        """单例模式"""
+        """单例模式，实例化时不加载配置，首次访问时再加载"""
         if cls._instance is None:
             cls._instance = super(Config, cls).__new__(cls)
-            cls._instance._load_config()
         return cls._instance
 
+    def __getattr__(self, name):
+        """
+        首次访问配置属性时加载配置（仅在常规属性查找失败时调用）
+        
+        Args:
+            name: 属性名
+        """
+        if name.startswith('_') or self._loaded:
+            raise AttributeError(name)
+        self._ensure_loaded()
+        return getattr(self, name)
+
+    def _ensure_loaded(self):
+        """双重检查加锁，确保配置只加载一次"""
+        if self._loaded:
+            return
+        with Config._load_lock:
+            if not self._loaded:
+                self._load_config()
+                self._loaded = True
+
     def _load_config(self):
         """加载配置"""
         self._config = DEFAULT_CONFIG.copy()
+        self._view = MappingProxyType(self._config)
         
         # 从配置文件加载
         config_path = Path(CONFIG_FILE)
         if config_path.exists():
             try:
-                with open(config_path, 'r') as f:
-                    file_config = json.load(f)
-                    self._config.update(file_config)
+                self._config.update(_loads(config_path.read_bytes()))
             except Exception as e:
                 logging.error(f"加载配置文件出错: {e}")
         
         # 从环境变量加载
         if os.environ.get('WEBWHISPER_CONFIG'):
             try:
-                env_config = json.loads(os.environ.get('WEBWHISPER_CONFIG'))
+                env_config = _loads(os.environ.get('WEBWHISPER_CONFIG'))
                 self._config.update(env_config)
             except Exception as e:
                 logging.error(f"加载环境变量配置出错: {e}")
         
+        self._normalize()
+        
         # 确保目录存在
-        os.makedirs(self._config['upload_folder'], exist_ok=True)
-        os.makedirs(self._config['temp_folder'], exist_ok=True)
-        os.makedirs(self._config['models_folder'], exist_ok=True)
+        for key in ('upload_folder', 'temp_folder', 'models_folder'):
+            ensure_dir(self._config[key])
         
         # 设置默认的 whisper 可执行文件路径
         if not self._config['whisper_executable']:
             self._config['whisper_executable'] = self._get_default_whisper_path()
+        
+        self._sync_attrs(self._config)
+        self._dirty = False
+        self._saved_digest = hash(_dump_json(self._config))
+
+    def _normalize(self):
+        """
+        规范化配置值：扩展名统一为小写并转为 frozenset，便于快速查找和共享；
+        allowed_models 保留原有顺序供页面展示，另建 allowed_model_set 用于成员检查
+        """
+        self._config['allowed_extensions'] = frozenset(
+            ext.lower() for ext in self._config['allowed_extensions']
+        )
+        self.allowed_model_set = frozenset(self._config['allowed_models'])
+
+    def _sync_attrs(self, items):
+        """
+        将配置项同步为实例属性，热路径可直接使用 config.upload_folder 代替 config.get('upload_folder')
+        
+        Args:
+            items: 需要同步的配置项字典
+        """
+        for key in items:
+            # 与方法同名的配置项只能通过 get 访问
+            if not hasattr(Config, key):
+                setattr(self, key, self._config[key])
 
     def _get_default_whisper_path(self):
-        """获取默认的 whisper 可执行文件路径"""
-        if os.name == "nt":
-            # Windows 路径
-            whisper_dir = FileUtils.get_project_path("Whisper_win-x64")
-            whisper_exe = os.path.join(whisper_dir, "whisper-cli.exe")
-        else:
-            # Linux 路径
-            whisper_dir = FileUtils.get_project_path("Whisper_linux-x64")
-            whisper_exe = os.path.join(whisper_dir, "whisper-cli")
+        """获取默认的 whisper 可执行文件路径（结果缓存，只检测一次文件是否存在）"""
+        if Config._default_whisper_path is None:
+            if os.name == "nt":
+                # Windows 路径
+                whisper_dir = Path(FileUtils.get_project_path("Whisper_win-x64"))
+                whisper_exe = whisper_dir / "whisper-cli.exe"
+            else:
+                # Linux 路径
+                whisper_dir = Path(FileUtils.get_project_path("Whisper_linux-x64"))
+                whisper_exe = whisper_dir / "whisper-cli"
+            
+            # 可执行文件不存在时返回目录路径，即使目录也不存在
+            Config._default_whisper_path = whisper_exe if whisper_exe.exists() else whisper_dir
         
-        # 检查可执行文件是否存在
-        if os.path.exists(whisper_exe):
-            return whisper_exe
-        elif os.path.exists(whisper_dir):
-            return whisper_dir
-        else:
-            return whisper_dir  # 返回目录路径，即使它不存在
+        # 配置值保持为字符串，以便保存为 JSON
+        return str(Config._default_whisper_path)
 
     def save(self):
         """保存配置到文件"""
+        self._ensure_loaded()
+        config_path = Path(CONFIG_FILE)
+        exists = config_path.exists()
+        if not self._dirty and exists:
+            return True
         try:
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(self._config, f, indent=4)
+            content = _dump_json(self._config)
+            digest = hash(content)
+            # 修改后又改回原值时内容不变，无需写入
+            if digest != self._saved_digest or not exists:
+                _write_atomic(config_path, content)
+                self._saved_digest = digest
+            self._dirty = False
             return True
         except Exception as e:
             logging.error(f"保存配置文件出错: {e}")
@@ -111,22 +257,39 @@ class Config:
 
     def get(self, key, default=None):
         """获取配置项"""
+        self._ensure_loaded()
         return self._config.get(key, default)
 
     def set(self, key, value):
         """设置配置项"""
+        self._ensure_loaded()
         self._config[key] = value
+        if key in ('allowed_extensions', 'allowed_models'):
+            self._normalize()
+        self._sync_attrs((key,))
+        self._dirty = True
         return self
 
     def update(self, config_dict):
         """批量更新配置"""
+        self._ensure_loaded()
         self._config.update(config_dict)
+        if 'allowed_extensions' in config_dict or 'allowed_models' in config_dict:
+            self._normalize()
+        self._sync_attrs(config_dict)
+        self._dirty = True
         return self
 
     @property
     def as_dict(self):
-        """返回配置字典"""
-        return self._config.copy()
+        """返回配置的只读视图（不复制，需要可修改的副本时使用 snapshot）"""
+        self._ensure_loaded()
+        return self._view
+
+    def snapshot(self):
+        """返回配置字典的副本"""
+        self._ensure_loaded()
+        return dict(self._config)
 
 
 # 导出配置实例
@@ -5,11 +5,32 @@ WebWhisper 文件管理模块
 
 import os
 import time
+import shutil
+from functools import lru_cache
 from pathlib import Path
 from werkzeug.utils import secure_filename
 
 from webwhisper.utils.logging_utils import logger
-from webwhisper.config import config
+from webwhisper.config import config, ensure_dir
+from webwhisper.core.task_manager import task_manager
+from webwhisper.utils.whisper_utils import release_prepared_audio
+
+# 上传文件落盘时的读写块大小，大块拷贝可显著减少系统调用次数
+_UPLOAD_COPY_BUFSIZE = 4 * 1024 * 1024
+
+
+@lru_cache(maxsize=1024)
+def _secure_filename(filename):
+    """
+    安全处理文件名，结果按原文件名缓存（缓存有上限，避免大量不同文件名占用内存）
+    
+    Args:
+        filename: 原始文件名
+    
+    Returns:
+        str: 安全的文件名
+    """
+    return secure_filename(filename)
 
 
 class FileManager:
@@ -23,7 +44,8 @@ class FileManager:
             upload_folder: 上传文件夹路径
         """
         self.upload_folder = upload_folder or config.get('upload_folder')
-        os.makedirs(self.upload_folder, exist_ok=True)
+        self._upload_dir = Path(self.upload_folder)
+        ensure_dir(self.upload_folder)
     
     def allowed_file(self, filename):
         """
@@ -35,8 +57,9 @@ class FileManager:
         Returns:
             bool: 是否允许
         """
-        allowed_extensions = config.get('allowed_extensions')
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+        # allowed_extensions 在配置中已规范化为小写 frozenset
+        _, dot, ext = filename.rpartition('.')
+        return bool(dot) and ext.lower() in config.allowed_extensions
     
     def save_uploaded_file(self, file_obj):
         """
@@ -59,19 +82,17 @@ class FileManager:
         
         try:
             # 安全处理文件名
-            filename = secure_filename(file_obj.filename)
+            filename = _secure_filename(file_obj.filename)
             
-            # 添加时间戳避免文件名冲突
-            base_name, ext = os.path.splitext(filename)
-            timestamp = int(time.time())
-            filename = f"{base_name}_{timestamp}{ext}"
+            # 创建任务ID，并加入文件名避免同名文件冲突
+            task_id = task_manager.new_task_id()
+            name = Path(filename)
+            filename = f"{name.stem}_{task_id}{name.suffix}"
             
             # 保存文件
-            file_path = os.path.join(self.upload_folder, filename)
-            file_obj.save(file_path)
-            
-            # 创建任务ID
-            task_id = str(timestamp)
+            file_path = str(self._upload_dir / filename)
+            with open(file_path, 'wb') as dst:
+                shutil.copyfileobj(file_obj.stream, dst, _UPLOAD_COPY_BUFSIZE)
             
             logger.info(f"文件已上传: {file_path}, 任务ID: {task_id}")
             
@@ -96,7 +117,7 @@ class FileManager:
         Returns:
             str: 文件路径
         """
-        return os.path.join(self.upload_folder, filename)
+        return str(self._upload_dir / filename)
     
     def file_exists(self, filename):
         """
@@ -108,7 +129,7 @@ class FileManager:
         Returns:
             bool: 是否存在
         """
-        return os.path.exists(self.get_file_path(filename))
+        return (self._upload_dir / filename).exists()
     
     def delete_file(self, filename):
         """
@@ -120,12 +141,13 @@ class FileManager:
         Returns:
             bool: 是否成功
         """
+        file_path = self.get_file_path(filename)
+        release_prepared_audio(file_path)
         try:
-            file_path = self.get_file_path(filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"文件已删除: {file_path}")
-                return True
+            os.remove(file_path)
+            logger.info(f"文件已删除: {file_path}")
+            return True
+        except FileNotFoundError:
             return False
         except Exception as e:
             logger.error(f"删除文件失败: {str(e)}")
@@ -142,24 +164,54 @@ class FileManager:
             int: 删除的文件数量
         """
         try:
-            count = 0
             now = time.time()
             max_age_seconds = max_age_hours * 3600
             
-            for filename in os.listdir(self.upload_folder):
-                file_path = os.path.join(self.upload_folder, filename)
-                if os.path.isfile(file_path):
-                    file_age = now - os.path.getmtime(file_path)
-                    if file_age > max_age_seconds:
-                        os.remove(file_path)
-                        count += 1
-                        logger.info(f"已清理旧文件: {file_path}")
+            # 支持时只打开一次目录，scandir/stat/unlink 都相对该目录句柄进行（*at 系统调用），
+            # 不再为每个文件重新解析完整路径
+            if os.scandir in os.supports_fd and os.unlink in os.supports_dir_fd:
+                dir_fd = os.open(self.upload_folder, os.O_RDONLY)
+                try:
+                    with os.scandir(dir_fd) as entries:
+                        count = self._remove_expired(entries, now, max_age_seconds, dir_fd)
+                finally:
+                    os.close(dir_fd)
+            else:
+                with os.scandir(self.upload_folder) as entries:
+                    count = self._remove_expired(entries, now, max_age_seconds)
             
             return count
         
         except Exception as e:
             logger.error(f"清理旧文件失败: {str(e)}")
             return 0
+    
+    def _remove_expired(self, entries, now, max_age_seconds, dir_fd=None):
+        """
+        删除目录项中超过保留时间的文件
+        
+        Args:
+            entries: scandir 返回的目录项迭代器
+            now: 当前时间戳
+            max_age_seconds: 最大保留时间（秒）
+            dir_fd: 目录句柄，提供时按文件名相对该目录删除
+        
+        Returns:
+            int: 删除的文件数量
+        """
+        count = 0
+        # 目录项自带文件类型，并缓存 stat 结果，减少系统调用
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            if now - entry.stat(follow_symlinks=False).st_mtime > max_age_seconds:
+                os.unlink(entry.name if dir_fd is not None else entry.path, dir_fd=dir_fd)
+                # 从未转录的上传文件可能还留有后台转换的记录和 WAV
+                file_path = str(self._upload_dir / entry.name)
+                release_prepared_audio(file_path)
+                count += 1
+                logger.info(f"已清理旧文件: {file_path}")
+        return count
 
 
 # 导出文件管理器实例
@@ -7,10 +7,16 @@ import os
 import time
 import threading
 import queue
+import itertools
+import secrets
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from webwhisper.utils.logging_utils import logger
-from webwhisper.utils.whisper_utils import transcribe_audio, cleanup_temp_file
+from webwhisper.utils.whisper_utils import (
+    transcribe_audio, transcribe_audio_batch, cleanup_temp_file, max_concurrent_transcriptions,
+    release_prepared_audio
+)
 from webwhisper.models.task import TranscriptionTask, TaskStatus
 from webwhisper.config import config
 
@@ -27,7 +33,58 @@ class TaskManager:
         """
         self.tasks = OrderedDict()  # 使用有序字典，便于清理旧任务
         self.max_tasks = max_tasks
-        self.lock = threading.Lock()  # 用于线程安全
+        # 只保护任务字典本身，任务状态由各任务自己的锁保护
+        self._dict_lock = threading.RLock()
+        self._pool = None  # 转录线程池，首次启动任务时创建
+        self._pending = OrderedDict()  # 已提交但尚未开始转录的任务，空闲线程可将选项相同的任务合并批量转录
+        # 单调递增的任务ID，起点为随机 32 位值：进程内不会重复，重启后也难以预测、不易与上传目录中已有文件重名
+        self._next_id = itertools.count(secrets.randbits(32))
+    
+    def new_task_id(self):
+        """
+        分配新的任务ID
+        
+        Returns:
+            str: 任务ID（十六进制字符串）
+        """
+        with self._dict_lock:
+            return f"{next(self._next_id):x}"
+    
+    def _get_pool(self):
+        """
+        获取转录线程池，限制同时运行的 whisper 进程数量
+        
+        Returns:
+            ThreadPoolExecutor: 转录线程池
+        """
+        with self._dict_lock:
+            if self._pool is None:
+                max_workers = max_concurrent_transcriptions()
+                self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='whisper')
+                # 线程池的工作线程在 threading 关闭阶段就被等待结束，atexit 回调执行时已经太晚；
+                # 在此阶段之前取消排队任务并停止运行中的任务，退出时不必等所有转录跑完
+                threading._register_atexit(self.shutdown)
+                logger.info(f"转录线程池已创建: {max_workers} 个线程")
+            return self._pool
+    
+    def shutdown(self, wait=False):
+        """
+        关闭转录线程池，取消尚未开始的任务，并通知运行中的任务停止
+        
+        Args:
+            wait: 是否等待运行中的任务结束
+        """
+        with self._dict_lock:
+            pool, self._pool = self._pool, None
+            running = [task for task in self.tasks.values() if task.status == TaskStatus.RUNNING]
+        if pool is None:
+            return
+        pool.shutdown(wait=False, cancel_futures=True)
+        # 触发停止事件，正在运行的 whisper 进程随即被终止
+        for task in running:
+            task.stop_event.set()
+        if wait:
+            pool.shutdown(wait=True)
     
     def create_task(self, file_path, options, task_id=None):
         """
@@ -41,22 +98,26 @@ class TaskManager:
         Returns:
             TranscriptionTask: 任务对象
         """
-        with self.lock:
-            # 如果没有提供任务ID，则生成一个新的
-            if task_id is None:
-                task_id = str(int(time.time()))
-            
+        # 如果没有提供任务ID，则生成一个新的
+        if task_id is None:
+            task_id = self.new_task_id()
+        
+        with self._dict_lock:
             # 检查文件是否存在
             if not os.path.exists(file_path):
                 logger.error(f"文件不存在: {file_path}")
                 task = TranscriptionTask(task_id, file_path, options)
                 task.fail("文件不存在")
                 self.tasks[task_id] = task
+                # 上传时可能已提交后台转换，任务不会再运行，直接放弃
+                release_prepared_audio(file_path)
                 return task
             
             # 创建任务
             task = TranscriptionTask(task_id, file_path, options)
             self.tasks[task_id] = task
+            # 复用任务ID时移到末尾，保持字典按创建顺序排列
+            self.tasks.move_to_end(task_id)
             
             # 清理旧任务，保持任务数量在限制内
             self._clean_old_tasks()
@@ -74,47 +135,85 @@ class TaskManager:
         Returns:
             bool: 是否成功启动
         """
-        with self.lock:
-            if task_id not in self.tasks:
-                logger.error(f"任务不存在: {task_id}")
-                return False
-            
-            task = self.tasks[task_id]
-            
-            # 如果任务已经在运行或已完成，不再启动
-            if task.status in [TaskStatus.RUNNING, TaskStatus.COMPLETED]:
-                return False
-            
-            # 标记任务为运行状态
-            task.start()
+        task = self.get_task(task_id)
+        if task is None:
+            logger.error(f"任务不存在: {task_id}")
+            return False
         
-        # 启动转录线程
-        thread = threading.Thread(
-            target=self._run_transcription,
-            args=(task_id,)
-        )
-        thread.daemon = True
-        thread.start()
+        # 如果任务已经在运行或已完成，不再启动；否则标记任务为运行状态
+        if not task.try_start():
+            return False
+        
+        # 提交到转录线程池，超出并发上限的任务排队等待
+        with self._dict_lock:
+            self._pending[task_id] = task
+        self._get_pool().submit(self._run_transcription, task_id)
         
         logger.info(f"已启动任务: {task_id}")
         return True
     
+    @staticmethod
+    def _batch_key(options):
+        """
+        批量合并的依据：只有生成相同 whisper 命令参数的任务才能合并
+        
+        Args:
+            options: 转录选项
+        
+        Returns:
+            tuple: 合并键
+        """
+        return (
+            options.get('model_name', 'base'),
+            options.get('language', 'auto'),
+            options.get('task'),
+            options.get('beam_size', 5)
+        )
+    
+    def _claim_batch(self, task_id):
+        """
+        取出待转录任务，并合并排队中选项相同的其他任务
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            list: 本次要转录的任务，任务已被其他批次处理时为空列表
+        """
+        with self._dict_lock:
+            task = self._pending.pop(task_id, None)
+            if task is None:
+                return []
+            batch = [task]
+            # 常驻进程已省去模型加载，无需合并
+            limit = 1 if config.persistent_workers else config.get('max_batch_files', 1)
+            if limit > 1:
+                key = self._batch_key(task.options)
+                for other_id, other in list(self._pending.items()):
+                    if len(batch) >= limit:
+                        break
+                    if self._batch_key(other.options) == key:
+                        del self._pending[other_id]
+                        batch.append(other)
+            return batch
+    
     def _run_transcription(self, task_id):
         """
-        运行转录任务
+        运行转录任务，有选项相同的任务在排队时合并为一次批量转录
         
         Args:
             task_id: 任务ID
         """
+        # 排队期间已被取消的任务不再转录
+        batch = [task for task in self._claim_batch(task_id) if not task.stop_event.is_set()]
+        if len(batch) > 1:
+            self._run_batch(batch)
+            return
+        if not batch:
+            return
+        task = batch[0]
+        
         try:
-            with self.lock:
-                if task_id not in self.tasks:
-                    logger.error(f"任务不存在: {task_id}")
-                    return
-                
-                task = self.tasks[task_id]
-                task.start()
-            
             # 执行转录
             result = transcribe_audio(
                 task.file_path,
@@ -123,13 +222,11 @@ class TaskManager:
                 stop_event=task.stop_event
             )
             
-            # 处理结果
-            with self.lock:
-                if task_id in self.tasks:
-                    if result.get('cancelled'):
-                        self.tasks[task_id].cancel()
-                    else:
-                        self.tasks[task_id].complete(result)
+            # 处理结果，任务状态由任务自己的锁保护，无需持有字典锁
+            if result.get('cancelled'):
+                task.cancel()
+            else:
+                task.complete(result)
             
             # 根据配置清理临时文件
             temp_audio_path = result.get('temp_audio_path')
@@ -138,9 +235,36 @@ class TaskManager:
         
         except Exception as e:
             logger.error(f"转录任务异常: {task_id}, 错误: {str(e)}")
-            with self.lock:
-                if task_id in self.tasks:
-                    self.tasks[task_id].fail(str(e))
+            task.fail(str(e))
+            release_prepared_audio(task.file_path)
+    
+    def _run_batch(self, batch):
+        """
+        用一次 whisper 调用转录多个任务，模型只加载一次
+        
+        Args:
+            batch: 任务列表，转录选项相同
+        """
+        logger.info(f"批量转录任务: {[task.task_id for task in batch]}")
+        try:
+            results = transcribe_audio_batch(
+                [task.file_path for task in batch],
+                batch[0].options,
+                [task.update_progress for task in batch],
+                [task.stop_event for task in batch]
+            )
+        except Exception as e:
+            logger.error(f"批量转录任务异常: {str(e)}")
+            for task in batch:
+                task.fail(str(e))
+                release_prepared_audio(task.file_path)
+            return
+        
+        for task, result in zip(batch, results):
+            if result.get('cancelled'):
+                task.cancel()
+            else:
+                task.complete(result)
     
     def cancel_task(self, task_id):
         """
@@ -152,20 +276,20 @@ class TaskManager:
         Returns:
             bool: 是否成功取消
         """
-        with self.lock:
-            if task_id not in self.tasks:
-                logger.error(f"任务不存在: {task_id}")
-                return False
-            
-            task = self.tasks[task_id]
-            
-            # 只有运行中的任务可以取消
-            if task.status != TaskStatus.RUNNING:
-                return False
-            
-            task.cancel()
-            logger.info(f"已取消任务: {task_id}")
-            return True
+        task = self.get_task(task_id)
+        if task is None:
+            logger.error(f"任务不存在: {task_id}")
+            return False
+        
+        # 只有运行中的任务可以取消
+        if not task.try_cancel():
+            return False
+        
+        # 排队中的任务不会再取用后台转换的结果；运行中的任务已取走，此处不会重复清理
+        release_prepared_audio(task.file_path)
+        
+        logger.info(f"已取消任务: {task_id}")
+        return True
     
     def get_task(self, task_id):
         """
@@ -177,25 +301,32 @@ class TaskManager:
         Returns:
             TranscriptionTask: 任务对象
         """
-        with self.lock:
+        with self._dict_lock:
             return self.tasks.get(task_id)
     
-    def get_task_status(self, task_id):
+    def get_task_status(self, task_id, wait=None, last_progress=None):
         """
         获取任务状态
         
         Args:
             task_id: 任务ID
+            wait: 长轮询等待时间（秒），为空时立即返回
+            last_progress: 客户端上次看到的进度，为空时以当前进度为准
         
         Returns:
             dict: 任务状态字典
         """
-        with self.lock:
-            task = self.tasks.get(task_id)
-            if not task:
-                return {'success': False, 'error': '任务不存在'}
-            
-            return task.to_dict()
+        task = self.get_task(task_id)
+        if not task:
+            return {'success': False, 'error': '任务不存在'}
+        
+        # 长轮询：进度变化或任务终止前不返回，减少客户端的轮询次数
+        if wait:
+            if last_progress is None:
+                last_progress = task.progress
+            task.wait_for_change(last_progress, wait)
+        
+        return task.to_dict()
     
     def get_task_result(self, task_id):
         """
@@ -207,12 +338,11 @@ class TaskManager:
         Returns:
             dict: 任务结果字典
         """
-        with self.lock:
-            task = self.tasks.get(task_id)
-            if not task:
-                return {'success': False, 'error': '任务不存在'}
-            
-            return task.get_result_dict()
+        task = self.get_task(task_id)
+        if not task:
+            return {'success': False, 'error': '任务不存在'}
+        
+        return task.get_result_dict()
     
     def get_all_tasks(self):
         """
@@ -221,25 +351,17 @@ class TaskManager:
         Returns:
             dict: 任务ID到任务对象的映射
         """
-        with self.lock:
+        with self._dict_lock:
             return self.tasks.copy()
     
     def _clean_old_tasks(self):
         """
         清理旧任务，保持任务数量在限制内
         """
-        if len(self.tasks) <= self.max_tasks:
-            return
-        
-        # 按创建时间排序，删除最旧的任务
-        tasks_by_time = sorted(
-            self.tasks.items(),
-            key=lambda x: x[1].created_at
-        )
-        
-        # 删除超出限制的任务
-        for task_id, _ in tasks_by_time[:len(tasks_by_time) - self.max_tasks]:
-            del self.tasks[task_id]
+        # 任务按创建顺序插入有序字典，从头部弹出即为最旧的任务
+        while len(self.tasks) > self.max_tasks:
+            task_id, task = self.tasks.popitem(last=False)
+            release_prepared_audio(task.file_path)
             logger.info(f"已清理旧任务: {task_id}")
     
     def clean_completed_tasks(self, max_age_hours=24):
@@ -252,7 +374,7 @@ class TaskManager:
         Returns:
             int: 清理的任务数量
         """
-        with self.lock:
+        with self._dict_lock:
             count = 0
             now = time.time()
             max_age_seconds = max_age_hours * 3600
@@ -260,13 +382,14 @@ class TaskManager:
             # 找出需要删除的任务
             to_delete = []
             for task_id, task in self.tasks.items():
-                if task.status in [TaskStatus.COMPLETED, TaskStatus.ERROR, TaskStatus.CANCELLED]:
+                if task.is_terminal():
                     if task.updated_at < now - max_age_seconds:
                         to_delete.append(task_id)
             
             # 删除任务
             for task_id in to_delete:
-                del self.tasks[task_id]
+                task = self.tasks.pop(task_id)
+                release_prepared_audio(task.file_path)
                 count += 1
                 logger.info(f"已清理完成的旧任务: {task_id}")
             
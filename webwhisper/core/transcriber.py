@@ -7,9 +7,10 @@ import os
 from pathlib import Path
 
 from webwhisper.utils.logging_utils import logger
-from webwhisper.utils.whisper_utils import transcribe_audio
+from webwhisper.utils.whisper_utils import prepare_audio
 from webwhisper.utils.subtitle_utils import whisper_to_srt, segments_to_srt, save_srt
 from webwhisper.core.task_manager import task_manager
+from webwhisper.models.task import TaskStatus
 from webwhisper.config import config
 from pycore.utils.file_utils import FileUtils
 
@@ -21,6 +22,22 @@ class Transcriber:
         """初始化转录器"""
         self.task_manager = task_manager
     
+    def prepare_audio(self, file_path):
+        """
+        提前在后台转换上传的音频，使转换与用户选择转录选项的时间重叠
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            Future: 转换任务，提交失败时返回 None
+        """
+        try:
+            return prepare_audio(file_path)
+        except Exception as e:
+            logger.warning(f"提交音频预处理失败: {str(e)}")
+            return None
+    
     def create_transcription_task(self, file_path, options):
         """
         创建转录任务
@@ -39,6 +56,11 @@ class Transcriber:
             # 创建任务
             task = self.task_manager.create_task(file_path, options, task_id)
             
+            # 确保音频转换已在后台进行（上传时已提交的不会重复提交），与排队等待转录的时间重叠
+            # 创建时已失败的任务不会再运行，不提交转换；任务取消时由任务管理器放弃转换
+            if task.status == TaskStatus.PENDING:
+                self.prepare_audio(file_path)
+            
             return {
                 'success': True,
                 'task_id': task.task_id
@@ -102,17 +124,19 @@ class Transcriber:
         """
         return task_manager.get_task_result(task_id)
     
-    def get_transcription_status(self, task_id):
+    def get_transcription_status(self, task_id, wait=None, last_progress=None):
         """
         获取转录状态
         
         Args:
             task_id: 任务ID
+            wait: 长轮询等待时间（秒），为空时立即返回
+            last_progress: 客户端上次看到的进度
         
         Returns:
             dict: 状态信息
         """
-        return task_manager.get_task_status(task_id)
+        return task_manager.get_task_status(task_id, wait, last_progress)
     
     def generate_srt(self, task_id, output_path=None):
         """
@@ -131,27 +155,35 @@ class Transcriber:
             return {'success': False, 'error': '任务不存在'}
         
         # 检查任务是否完成
-        if task.status != 'completed':
+        if task.status != TaskStatus.COMPLETED:
             return {'success': False, 'error': '转录尚未完成'}
         
         try:
-            # 生成SRT内容
-            if task.result.get('segments'):
-                # 使用分段数据生成SRT
-                srt_content = segments_to_srt(task.result.get('segments', []))
-            else:
-                # 使用原始Whisper输出生成SRT
-                whisper_output = task.result.get('text', '')
-                srt_content = whisper_to_srt(whisper_output)
+            # 生成SRT内容，任务完成后结果不再变化，生成一次即可复用
+            srt_content = task.srt_cache
+            if srt_content is None:
+                if task.result.get('segments'):
+                    # 使用分段数据生成SRT
+                    srt_content = segments_to_srt(task.result.get('segments', []))
+                else:
+                    # 使用原始Whisper输出生成SRT
+                    whisper_output = task.result.get('text', '')
+                    srt_content = whisper_to_srt(whisper_output)
+                task.srt_cache = srt_content
             
             # 如果没有指定输出路径，使用默认路径
             if not output_path:
                 file_path = task.file_path
                 filename = os.path.splitext(os.path.basename(file_path))[0] + '.srt'
-                output_path = os.path.join(config.get('upload_folder'), filename)
+                output_path = os.path.join(config.upload_folder, filename)
             
-            # 保存SRT文件
-            success = save_srt(srt_content, output_path)
+            # 保存SRT文件，同一路径已写入过相同内容时跳过
+            if output_path == task.srt_path and os.path.isfile(output_path):
+                success = True
+            else:
+                success = save_srt(srt_content, output_path)
+                if success:
+                    task.srt_path = output_path
             
             if success:
                 return {
@@ -5,9 +5,10 @@ WebWhisper 任务数据模型
 
 import time
 import threading
-import queue
 from enum import Enum
 
+from webwhisper.utils.logging_utils import logger
+
 
 class TaskStatus(Enum):
     """任务状态枚举"""
@@ -18,6 +19,13 @@ class TaskStatus(Enum):
     ERROR = "error"
 
 
+# 终止状态，任务进入后不再变化
+_TERMINAL_STATUSES = frozenset({TaskStatus.COMPLETED, TaskStatus.CANCELLED, TaskStatus.ERROR})
+
+# 正在运行或已完成的状态，处于这些状态的任务不能再次启动
+_ACTIVE_OR_DONE = frozenset({TaskStatus.RUNNING, TaskStatus.COMPLETED})
+
+
 class TranscriptionTask:
     """转录任务类"""
     
@@ -38,13 +46,140 @@ class TranscriptionTask:
         self.message = "等待开始"
         self.result = None
         self.error = None
+        self.completion_payload = None  # 完成通知负载，任务完成时生成一次
+        self.terminal_payload = None  # 终止通知负载，进入终止状态时生成一次，供迟到的订阅者复用
+        self.srt_cache = None  # 已生成的 SRT 内容，任务结果不变时重复导出直接复用
+        self.srt_path = None  # 最近一次写入 SRT 文件的路径
         self.created_at = time.time()
         self.updated_at = time.time()
         self.completed_at = None
         
+        # 保护任务状态转换，使状态检查和修改成为原子操作（可重入）
+        self._state_lock = threading.RLock()
+        
         # 用于进度通信和任务控制
-        self.progress_queue = queue.Queue()
+        # 进度只保留最新一条，序号用于判断是否有未读取的进度，Condition 用于唤醒等待者
+        self.latest_progress = None
+        self.progress_seq = 0
+        self.consumed_seq = 0
+        self.progress_cv = threading.Condition()
         self.stop_event = threading.Event()
+        
+        # 进度观察者和终止事件，用于事件驱动的进度推送
+        self.observers = set()
+        self.terminal_event = threading.Event()
+    
+    @property
+    def status(self):
+        """任务状态"""
+        return self._status
+    
+    @status.setter
+    def status(self, value):
+        # 同时缓存状态字符串，序列化时无需每次访问枚举的 value
+        self._status = value
+        self.status_str = value.value
+    
+    def is_terminal(self):
+        """
+        任务是否已进入终止状态（完成、失败或取消）
+        
+        Returns:
+            bool: 是否已终止
+        """
+        return self.terminal_event.is_set()
+    
+    def add_observer(self, callback):
+        """
+        注册观察者，任务进度或状态变化时调用 callback(task)
+        
+        Args:
+            callback: 回调函数
+        """
+        self.observers.add(callback)
+    
+    def remove_observer(self, callback):
+        """
+        移除观察者
+        
+        Args:
+            callback: 回调函数
+        """
+        self.observers.discard(callback)
+    
+    def _notify_observers(self):
+        """通知所有观察者"""
+        for callback in list(self.observers):
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"任务观察者回调失败: task_id={self.task_id}, error={str(e)}")
+    
+    def _set_terminal_payload(self):
+        """生成终止通知负载，调用方需持有 _state_lock"""
+        if self.status == TaskStatus.COMPLETED:
+            self.terminal_payload = self.completion_payload
+        elif self.status == TaskStatus.ERROR:
+            self.terminal_payload = {'task_id': self.task_id, 'error': self.error}
+        else:
+            self.terminal_payload = {'task_id': self.task_id}
+    
+    def _finish(self):
+        """标记任务进入终止状态并通知观察者"""
+        self.terminal_event.set()
+        with self.progress_cv:
+            self.progress_cv.notify_all()
+        self._notify_observers()
+    
+    def wait_for_change(self, last_progress, timeout=None):
+        """
+        等待进度偏离 last_progress 或任务终止，用于状态查询的长轮询
+        
+        Args:
+            last_progress: 调用方上次看到的进度
+            timeout: 超时时间（秒），None 表示一直等待
+            
+        Returns:
+            bool: 是否在超时前发生了变化
+        """
+        with self.progress_cv:
+            return self.progress_cv.wait_for(
+                lambda: self.progress != last_progress or self.terminal_event.is_set(), timeout
+            )
+    
+    def drain_progress(self):
+        """
+        取出最新进度，自上次读取后没有新进度时返回 None
+        
+        Returns:
+            dict: 最新进度数据，没有时返回 None
+        """
+        with self.progress_cv:
+            return self._take_progress()
+    
+    def peek_progress(self):
+        """
+        查看未读的最新进度但不标记为已读
+        
+        Returns:
+            dict: 最新进度数据，没有时返回 None
+        """
+        with self.progress_cv:
+            if self.progress_seq == self.consumed_seq:
+                return None
+            return self.latest_progress
+    
+    def _take_progress(self):
+        """
+        读取未读的最新进度，调用方需持有 progress_cv
+        
+        Returns:
+            dict: 最新进度数据，没有时返回 None
+        """
+        if self.progress_seq == self.consumed_seq:
+            return None
+        self.consumed_seq = self.progress_seq
+        return self.latest_progress
     
     def update_progress(self, progress, message=None):
         """
@@ -54,23 +189,50 @@ class TranscriptionTask:
             progress: 进度百分比
             message: 进度消息
         """
-        self.progress = progress
-        if message:
-            self.message = message
-        self.updated_at = time.time()
+        with self._state_lock:
+            self.progress = progress
+            if message:
+                self.message = message
+            self.updated_at = time.time()
         
-        # 将进度放入队列
-        self.progress_queue.put({
-            'progress': progress,
-            'message': message or self.message
-        })
+        # 覆盖最新进度，中间值对订阅者没有意义
+        # 进度数据即 progress_update 事件的负载，分发时直接发送无需重新构建
+        with self.progress_cv:
+            self.latest_progress = {
+                'task_id': self.task_id,
+                'progress': progress,
+                'message': message or self.message
+            }
+            self.progress_seq += 1
+            self.progress_cv.notify_all()
+        
+        self._notify_observers()
     
     def cancel(self):
         """取消任务"""
-        self.status = TaskStatus.CANCELLED
-        self.stop_event.set()
-        self.message = "任务已取消"
-        self.updated_at = time.time()
+        with self._state_lock:
+            # 任务已经结束时保持原有结果
+            if self.status in _TERMINAL_STATUSES:
+                return
+            self.status = TaskStatus.CANCELLED
+            self.stop_event.set()
+            self.message = "任务已取消"
+            self.updated_at = time.time()
+            self._set_terminal_payload()
+        self._finish()
+    
+    def try_cancel(self):
+        """
+        取消运行中的任务
+        
+        Returns:
+            bool: 任务是否在运行并已取消
+        """
+        with self._state_lock:
+            if self.status != TaskStatus.RUNNING:
+                return False
+            self.cancel()
+            return True
     
     def complete(self, result):
         """
@@ -79,12 +241,22 @@ class TranscriptionTask:
         Args:
             result: 任务结果
         """
-        self.status = TaskStatus.COMPLETED
-        self.result = result
-        self.progress = 100
-        self.message = "任务已完成"
-        self.updated_at = time.time()
-        self.completed_at = time.time()
+        with self._state_lock:
+            if self.status in _TERMINAL_STATUSES:
+                return
+            self.status = TaskStatus.COMPLETED
+            self.result = result
+            self.completion_payload = {
+                'task_id': self.task_id,
+                'text': result.get('text', ''),
+                'has_segments': bool(result.get('segments'))
+            }
+            self.progress = 100
+            self.message = "任务已完成"
+            self.updated_at = time.time()
+            self.completed_at = time.time()
+            self._set_terminal_payload()
+        self._finish()
     
     def fail(self, error):
         """
@@ -93,16 +265,35 @@ class TranscriptionTask:
         Args:
             error: 错误信息
         """
-        self.status = TaskStatus.ERROR
-        self.error = error
-        self.message = f"任务失败: {error}"
-        self.updated_at = time.time()
+        with self._state_lock:
+            if self.status in _TERMINAL_STATUSES:
+                return
+            self.status = TaskStatus.ERROR
+            self.error = error
+            self.message = f"任务失败: {error}"
+            self.updated_at = time.time()
+            self._set_terminal_payload()
+        self._finish()
     
     def start(self):
         """开始任务"""
-        self.status = TaskStatus.RUNNING
-        self.message = "任务运行中"
-        self.updated_at = time.time()
+        with self._state_lock:
+            self.status = TaskStatus.RUNNING
+            self.message = "任务运行中"
+            self.updated_at = time.time()
+    
+    def try_start(self):
+        """
+        启动尚未运行且未完成的任务
+        
+        Returns:
+            bool: 是否已启动
+        """
+        with self._state_lock:
+            if self.status in _ACTIVE_OR_DONE:
+                return False
+            self.start()
+            return True
     
     def to_dict(self):
         """
@@ -114,7 +305,7 @@ class TranscriptionTask:
         return {
             'task_id': self.task_id,
             'file_path': self.file_path,
-            'status': self.status.value,
+            'status': self.status_str,
             'progress': self.progress,
             'message': self.message,
             'created_at': self.created_at,
@@ -134,20 +325,20 @@ class TranscriptionTask:
         if self.status == TaskStatus.COMPLETED:
             return {
                 'success': True,
-                'status': self.status.value,
+                'status': self.status_str,
                 'text': self.result.get('text', ''),
                 'segments': self.result.get('segments', [])
             }
         elif self.status == TaskStatus.ERROR:
             return {
                 'success': False,
-                'status': self.status.value,
+                'status': self.status_str,
                 'error': self.error
             }
         else:
             return {
                 'success': True,
-                'status': self.status.value,
+                'status': self.status_str,
                 'progress': self.progress,
                 'message': self.message
             } 
\ No newline at end of file
@@ -5,7 +5,11 @@ WebWhisper 日志工具模块
 
 import os
 import sys
+import queue
+import atexit
+import threading
 import logging
+import logging.handlers
 from pathlib import Path
 from datetime import datetime
 
@@ -27,6 +31,16 @@ DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 # 日志目录
 LOG_DIR = FileUtils.get_project_path('logs')
 
+# 单个日志文件的最大大小和保留的轮转文件数
+LOG_MAX_BYTES = 50 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# 文件日志的缓冲条数，攒满或遇到 ERROR 及以上级别时一次写出
+LOG_BUFFER_CAPACITY = 64
+
+# 日志监听器，由后台线程负责实际的日志 I/O
+_listeners = {}
+
 
 def setup_logger(name, level='info', log_file=None, console=True):
     """
@@ -47,23 +61,41 @@ def setup_logger(name, level='info', log_file=None, console=True):
     
     # 清除现有处理器
     logger.handlers = []
+    old_listener = _listeners.pop(name, None)
+    if old_listener:
+        old_listener.stop()
     
     # 创建格式化器
     formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+    handlers = []
     
     # 添加文件处理器
     if log_file:
         # 确保日志目录存在
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        # 缓冲后批量写入，减少逐条写文件的系统调用；关闭时会写出剩余日志
+        handlers.append(logging.handlers.MemoryHandler(
+            LOG_BUFFER_CAPACITY, flushLevel=logging.ERROR, target=file_handler
+        ))
     
     # 添加控制台处理器
     if console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
+    
+    # 通过队列转发日志，文件和控制台写入集中由监听线程完成，记录日志的调用方只需入队
+    # 注意 eventlet 会把监听线程变为绿色线程，写入本身仍在事件循环中执行
+    if handlers:
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[name] = listener
     
     return logger
 
@@ -88,8 +120,41 @@ def get_default_logger(name='webwhisper', level='info'):
     return setup_logger(name, level, log_file)
 
 
+class _LazyLogger:
+    """
+    默认日志记录器的代理，首次使用时才创建日志目录、文件和监听线程
+    
+    只导入模块而不记录日志的进程不会产生这些开销；用过的方法缓存在代理上，之后直接调用
+    """
+    
+    def __init__(self, factory):
+        self._factory = factory
+        self._logger = None
+        self._lock = threading.Lock()
+    
+    def _get(self):
+        if self._logger is None:
+            with self._lock:
+                if self._logger is None:
+                    self._logger = self._factory()
+        return self._logger
+    
+    def __getattr__(self, name):
+        value = getattr(self._get(), name)
+        if callable(value):
+            setattr(self, name, value)
+        return value
+
+
 # 导出默认日志记录器
-logger = get_default_logger()
+logger = _LazyLogger(get_default_logger)
+
+
+@atexit.register
+def _stop_listeners():
+    """退出时停止监听线程，确保队列中的日志全部写出"""
+    for listener in _listeners.values():
+        listener.stop()
 
 
 def debug_print(msg):
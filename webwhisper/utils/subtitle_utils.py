@@ -8,6 +8,14 @@ import os
 from pathlib import Path
 from webwhisper.utils.logging_utils import logger
 
+# whisper.cpp 输出的时间戳行，如 "[00:00:01.000 --> 00:00:03.500]  文本"，从行首匹配
+# 使用 re.ASCII，\d 只匹配 ASCII 数字，无需 Unicode 属性查找
+TIMESTAMP_RE = re.compile(
+    r'\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> '      # group(1) 开始时间
+    r'(\d{2}:\d{2}:\d{2}\.\d{3})\]'            # group(2) 结束时间
+    r' (.*)',                                  # group(3) 文本
+    re.ASCII
+)
 
 def whisper_to_srt(whisper_output):
     """
@@ -24,7 +32,7 @@ def whisper_to_srt(whisper_output):
     
     counter = 1
     for line in lines:
-        match = re.match(r'\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> (\d{2}:\d{2}:\d{2}\.\d{3})\] (.*)', line.strip())
+        match = TIMESTAMP_RE.match(line.strip())
         if match:
             start_time, end_time, text = match.groups()
             
@@ -53,25 +61,12 @@ def segments_to_srt(segments):
     Returns:
         str: SRT 格式文本
     """
-    srt_parts = []
-    
-    for i, segment in enumerate(segments, 1):
-        # 获取开始和结束时间
-        start_seconds = segment.get('start', 0)
-        end_seconds = segment.get('end', 0)
-        text = segment.get('text', '').strip()
-        
-        # 转换为 SRT 时间格式 (HH:MM:SS,mmm)
-        start_time = format_time(start_seconds)
-        end_time = format_time(end_seconds)
-        
-        # 格式化为 SRT 条目
-        srt_parts.append(f"{i}")
-        srt_parts.append(f"{start_time} --> {end_time}")
-        srt_parts.append(f"{text}")
-        srt_parts.append("")  # 空行
-    
-    return "\n".join(srt_parts)
+    # 每个条目由一个 f-string 生成：序号、时间 (HH:MM:SS,mmm)、文本，条目之间以空行分隔
+    return "\n".join(
+        f"{i}\n{format_time(segment.get('start', 0))} --> {format_time(segment.get('end', 0))}\n"
+        f"{segment.get('text', '').strip()}\n"
+        for i, segment in enumerate(segments, 1)
+    )
 
 
 def format_time(seconds):
@@ -84,12 +79,13 @@ def format_time(seconds):
     Returns:
         str: SRT 时间格式 (HH:MM:SS,mmm)
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = seconds % 60
-    milliseconds = int((seconds - int(seconds)) * 1000)
+    # 先四舍五入为整数毫秒（直接截断会把 12.999 变成 998 毫秒），之后只做整数 divmod
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
     
-    return f"{hours:02d}:{minutes:02d}:{int(seconds):02d},{milliseconds:03d}"
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
 
 
 def save_srt(srt_content, output_path):
@@ -107,9 +103,18 @@ def save_srt(srt_content, output_path):
         # 确保目录存在
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        # 写入文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(srt_content)
+        # 先写入临时文件再替换，写入中途出错不会留下截断的字幕文件
+        tmp_path = output_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(srt_content)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
         
         logger.info(f"SRT 文件已保存: {output_path}")
         return True
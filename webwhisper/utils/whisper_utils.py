@@ -4,18 +4,66 @@ WebWhisper Whisper 工具模块
 """
 
 import os
-import re
+import json
+import atexit
+import socket
+import logging
+import http.client
 import time
 import threading
+import selectors
 import subprocess
 import tempfile
+import uuid
+import wave
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import psutil
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时使用标准库 json
+    orjson = None
+
 from webwhisper.utils.logging_utils import logger
-from webwhisper.config import config
+from webwhisper.config import config, ensure_dir
+from webwhisper.utils.subtitle_utils import TIMESTAMP_RE
 from pycore.utils.file_utils import FileUtils
 
+# 音频预处理线程池，上传后即在后台转换音频，与等待转录的时间重叠
+_prep_pool = ThreadPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 2) // 2),
+    thread_name_prefix='audio-prep'
+)
+_prepared_audio = {}  # 文件路径 -> 转换任务 Future
+_prepared_lock = threading.Lock()
+
+# 退出时取消尚未开始的转换；须在 threading 关闭阶段等待工作线程之前执行，atexit 回调为时已晚
+threading._register_atexit(lambda: _prep_pool.shutdown(wait=False, cancel_futures=True))
+
+# 配置的 whisper 可执行文件路径 -> 解析后的绝对路径，配置不变时无需重复检查文件系统
+_exec_cache = {}
+
+
+# 等待进程输出时检查停止事件的间隔（秒），有输出时立即唤醒，不受此间隔影响
+_STOP_POLL_INTERVAL = 0.2
+
+# 每次从管道读取的最大字节数
+_PIPE_READ_SIZE = 65536
+
+
+def _ts_to_seconds(ts):
+    """
+    将定宽的 HH:MM:SS.mmm 时间戳转换为秒，按固定位置切片，无需 split
+    
+    Args:
+        ts: 时间戳字符串
+    
+    Returns:
+        float: 秒数
+    """
+    return int(ts[0:2]) * 3600 + int(ts[3:5]) * 60 + int(ts[6:8]) + int(ts[9:12]) / 1000.0
+
 
 def convert_audio_to_wav(file_path, temp_dir=None):
     """
@@ -29,18 +77,22 @@ def convert_audio_to_wav(file_path, temp_dir=None):
         str: WAV 文件路径
     """
     try:
-        from pydub import AudioSegment
-        
         # 创建临时文件
         if temp_dir is None:
-            temp_dir = FileUtils.get_project_path(config.get('temp_folder'))
+            temp_dir = FileUtils.get_project_path(config.temp_folder)
         
-        os.makedirs(temp_dir, exist_ok=True)
-        temp_wav_path = os.path.join(temp_dir, f"whisper_temp_{int(time.time())}.wav")
+        ensure_dir(temp_dir)
+        temp_wav_path = os.path.join(temp_dir, f"whisper_temp_{int(time.time())}_{uuid.uuid4().hex[:8]}.wav")
         
-        # 转换音频
-        audio = AudioSegment.from_file(file_path)
-        audio.export(temp_wav_path, format="wav")
+        # 直接由 ffmpeg 转换为 whisper.cpp 需要的 16kHz 单声道 16 位 PCM，音频数据不经过 Python 内存
+        proc = subprocess.run(
+            ['ffmpeg', '-y', '-loglevel', 'error', '-i', file_path,
+             '-ac', '1', '-ar', '16000', '-acodec', 'pcm_s16le', '-f', 'wav', temp_wav_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.decode('utf-8', errors='replace').strip() or f"ffmpeg 退出代码 {proc.returncode}")
         
         logger.info(f"音频文件已转换为 WAV 格式: {temp_wav_path}")
         return temp_wav_path
@@ -50,6 +102,92 @@ def convert_audio_to_wav(file_path, temp_dir=None):
         raise RuntimeError(f"音频转换失败: {str(e)}")
 
 
+def prepare_audio(file_path):
+    """
+    在后台线程池中提前转换音频
+    
+    转换结果由 transcribe_audio 取用，同一文件只会提交一次
+    
+    Args:
+        file_path: 音频文件路径
+    
+    Returns:
+        Future: 转换任务，结果为 WAV 文件路径
+    """
+    with _prepared_lock:
+        future = _prepared_audio.get(file_path)
+        if future is None:
+            future = _prep_pool.submit(convert_audio_to_wav, file_path)
+            _prepared_audio[file_path] = future
+    return future
+
+
+def release_prepared_audio(file_path):
+    """
+    放弃文件的后台转换：尚未开始时取消，否则在转换完成后按配置清理生成的 WAV
+    
+    用于不会再被转录的文件（任务取消、失败或被清理，上传文件过期），避免转换记录和临时文件一直保留
+    
+    Args:
+        file_path: 音频文件路径
+    """
+    with _prepared_lock:
+        future = _prepared_audio.pop(file_path, None)
+    if future is None or future.cancel():
+        return
+    future.add_done_callback(_cleanup_prepared)
+
+
+def _cleanup_prepared(future):
+    """
+    清理已放弃的后台转换生成的 WAV
+    
+    Args:
+        future: 转换任务
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    cleanup_temp_file(future.result())
+
+
+def prewarm_prep_pool():
+    """
+    预先启动音频预处理线程池的全部工作线程
+    
+    每个预热任务在屏障处等待，保证线程池创建出全部线程，首个上传请求无需再创建线程
+    """
+    workers = _prep_pool._max_workers
+    barrier = threading.Barrier(workers)
+    
+    def warm():
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+    
+    for _ in range(workers):
+        _prep_pool.submit(warm)
+    logger.info(f"音频预处理线程池已预热: {workers} 个线程")
+
+
+def get_wav_duration(wav_path):
+    """
+    读取 WAV 文件头获取音频时长
+    
+    Args:
+        wav_path: WAV 文件路径
+    
+    Returns:
+        float: 时长（秒），无法读取时返回 None
+    """
+    try:
+        with wave.open(wav_path, 'rb') as wav_file:
+            return wav_file.getnframes() / float(wav_file.getframerate())
+    except Exception as e:
+        logger.warning(f"读取 WAV 时长失败: {wav_path}, 错误: {str(e)}")
+        return None
+
+
 def cleanup_temp_file(temp_file_path):
     """
     清理临时文件
@@ -57,35 +195,62 @@ def cleanup_temp_file(temp_file_path):
     Args:
         temp_file_path: 临时文件路径
     """
-    if not config.get('cleanup_temp_files'):
+    if not config.cleanup_temp_files:
         logger.debug(f"根据配置保留临时文件: {temp_file_path}")
         return
         
-    if temp_file_path and os.path.exists(temp_file_path):
+    if temp_file_path:
+        # 直接删除，文件不存在时忽略，省去事先的 stat 调用
         try:
             os.remove(temp_file_path)
             logger.debug(f"已删除临时文件: {temp_file_path}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.warning(f"无法删除临时文件 {temp_file_path}: {str(e)}")
 
 
-def build_whisper_command(model_path, audio_path, options):
+def resolve_model_path(model_name):
     """
-    构建 Whisper 命令
+    获取模型文件路径
+    
+    如果配置了 model_quantization 且对应的量化模型存在（如 ggml-base-q5_0.bin），
+    优先使用量化模型，以减少内存带宽占用并加快推理；否则回退到原始模型。
     
     Args:
-        model_path: 模型路径
-        audio_path: 音频文件路径
-        options: 转录选项
+        model_name: 模型名称
     
     Returns:
-        list: 命令列表
+        str: 模型文件路径
     """
-    # 获取可执行文件路径
-    executable = config.get('whisper_executable')
+    models_folder = FileUtils.get_project_path(config.models_folder)
+    
+    quantization = config.model_quantization
+    if quantization:
+        quantized_path = os.path.join(models_folder, f"ggml-{model_name}-{quantization}.bin")
+        if os.path.exists(quantized_path):
+            return quantized_path
+        logger.warning(f"量化模型不存在，使用原始模型: {quantized_path}")
+    
+    return os.path.join(models_folder, f"ggml-{model_name}.bin")
+
+
+def resolve_whisper_executable(configured):
+    """
+    将配置的 whisper 路径解析为可执行文件的绝对路径，结果按配置值缓存
+    
+    Args:
+        configured: 配置的可执行文件或所在目录路径
+    
+    Returns:
+        str: 可执行文件绝对路径
+    """
+    cached = _exec_cache.get(configured)
+    if cached is not None:
+        return cached
     
     # 确保使用绝对路径
-    executable = FileUtils.get_project_path(executable)
+    executable = FileUtils.get_project_path(configured)
     
     # 如果用户选择了目录，猜测实际的二进制文件名
     if os.path.isdir(executable):
@@ -94,10 +259,102 @@ def build_whisper_command(model_path, audio_path, options):
         else:
             executable = os.path.join(executable, "whisper-cli")
     
-    # 检查可执行文件是否存在
+    # 检查可执行文件是否存在，不存在时不缓存，下次重新检查
     if not os.path.exists(executable):
         raise FileNotFoundError(f"Whisper 可执行文件不存在: {executable}")
     
+    _exec_cache[configured] = executable
+    return executable
+
+
+def _spawn(cmd, **kwargs):
+    """
+    启动 whisper 进程；可执行文件在缓存后被移走时清除对应缓存，下次重新解析路径
+    
+    Args:
+        cmd: 命令列表
+        **kwargs: 传给 subprocess.Popen 的参数
+    
+    Returns:
+        subprocess.Popen: 进程对象
+    """
+    try:
+        return subprocess.Popen(cmd, **kwargs)
+    except FileNotFoundError:
+        for configured, executable in list(_exec_cache.items()):
+            if executable == cmd[0]:
+                _exec_cache.pop(configured, None)
+        raise
+
+
+def _output_base(audio_path):
+    """
+    whisper.cpp 输出文件的路径前缀（-of 参数），与音频文件同名、不含扩展名
+    
+    Args:
+        audio_path: 音频文件路径
+    
+    Returns:
+        str: 输出文件路径前缀
+    """
+    return os.path.splitext(FileUtils.get_project_path(audio_path))[0]
+
+
+def _json_output_path(audio_path):
+    """
+    whisper.cpp -oj 为音频文件生成的 JSON 结果路径
+    
+    Args:
+        audio_path: 音频文件路径
+    
+    Returns:
+        str: JSON 文件路径
+    """
+    return _output_base(audio_path) + '.json'
+
+
+def max_concurrent_transcriptions():
+    """
+    同时运行的转录任务数，未配置时为 CPU 核数的一半
+    
+    Returns:
+        int: 并发转录数
+    """
+    return config.get('max_concurrent_transcriptions') or max(1, (os.cpu_count() or 2) // 2)
+
+
+def _default_threads(processors):
+    """
+    未配置线程数时每个分片使用的线程数
+    
+    CPU 核数在并发的转录任务和各分片之间平分，并与 whisper.cpp 的默认值一样最多 4 个，
+    避免多个 whisper 进程同时运行时线程数远超核数
+    
+    Args:
+        processors: 每个 whisper 进程的分片数
+    
+    Returns:
+        int: 线程数
+    """
+    share = (os.cpu_count() or 4) // (processors * max_concurrent_transcriptions())
+    return max(1, min(4, share))
+
+
+def build_whisper_command(model_path, audio_path, options):
+    """
+    构建 Whisper 命令
+    
+    Args:
+        model_path: 模型路径
+        audio_path: 音频文件路径
+        options: 转录选项
+    
+    Returns:
+        list: 命令列表
+    """
+    # 获取可执行文件路径
+    executable = resolve_whisper_executable(config.whisper_executable)
+    
     # 构建命令，确保所有路径都是绝对路径
     cmd = [
         executable,
@@ -108,17 +365,306 @@ def build_whisper_command(model_path, audio_path, options):
         "-l", options.get('language', 'auto')
     ]
     
+    # 将音频分片并行处理，提高多核/GPU 利用率
+    processors = int(config.whisper_processors or 1)
+    if processors > 1:
+        cmd.extend(["-p", str(processors)])
+    
+    # 计算线程数，未配置时按 CPU 核数平均分给并发的转录任务和各个分片
+    threads = int(config.whisper_threads or 0) or _default_threads(processors)
+    cmd.extend(["-t", str(threads)])
+    
     # 如果用户想要翻译为英文
     if options.get('task') == "translate":
         cmd.append("-translate")
     
-    # 始终使用带时间戳的 JSON 输出
-    cmd.append("-oj")
+    # 始终使用带时间戳的 JSON 输出，结果直接读取 JSON，无需解析标准输出
+    cmd.extend(["-oj", "-of", _output_base(audio_path)])
     
     return cmd
 
 
-def run_whisper_process(cmd, progress_callback=None, stop_event=None):
+def _stream_output_selectors(process, on_stdout, on_stderr, stop_event=None):
+    """
+    用 selectors 同时等待 stdout 和 stderr，有数据时才唤醒，按行回调
+    
+    Args:
+        process: whisper 子进程
+        on_stdout: stdout 行回调
+        on_stderr: stderr 行回调
+        stop_event: 停止事件
+    
+    Returns:
+        bool: 输出是否读取完毕，因停止事件中断时返回 False
+    """
+    buffers = {}
+    with selectors.DefaultSelector() as sel:
+        for stream, handler in ((process.stdout, on_stdout), (process.stderr, on_stderr)):
+            fd = stream.fileno()
+            os.set_blocking(fd, False)
+            sel.register(fd, selectors.EVENT_READ, handler)
+            buffers[fd] = bytearray()
+        
+        while sel.get_map():
+            if stop_event and stop_event.is_set():
+                return False
+            
+            for key, _ in sel.select(timeout=_STOP_POLL_INTERVAL):
+                fd = key.fd
+                try:
+                    chunk = os.read(fd, _PIPE_READ_SIZE)
+                except BlockingIOError:
+                    continue
+                
+                buf = buffers[fd]
+                if not chunk:
+                    # 管道关闭，处理没有换行结尾的最后一行
+                    sel.unregister(fd)
+                    if buf:
+                        key.data(buf.decode('utf-8', errors='replace'))
+                    continue
+                
+                buf += chunk
+                end = buf.rfind(b'\n')
+                if end < 0:
+                    continue
+                # 每次只解码完整的行，剩余部分留在缓冲区等待后续数据
+                text = buf[:end].decode('utf-8', errors='replace')
+                del buf[:end + 1]
+                for line in text.splitlines():
+                    key.data(line)
+    return True
+
+
+def _stream_output_threaded(process, on_stdout, on_stderr, stop_event=None):
+    """
+    不支持对管道使用 select 的平台（Windows）上，用单独的线程读取 stderr，当前线程逐行读取 stdout
+    
+    Args:
+        process: whisper 子进程
+        on_stdout: stdout 行回调
+        on_stderr: stderr 行回调
+        stop_event: 停止事件
+    
+    Returns:
+        bool: 输出是否读取完毕，因停止事件中断时返回 False
+    """
+    def read_stderr():
+        for raw in iter(process.stderr.readline, b''):
+            if stop_event and stop_event.is_set():
+                return
+            on_stderr(raw.decode('utf-8', errors='replace').rstrip('\r\n'))
+    
+    stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+    stderr_thread.start()
+    
+    for raw in iter(process.stdout.readline, b''):
+        if stop_event and stop_event.is_set():
+            return False
+        on_stdout(raw.decode('utf-8', errors='replace').rstrip('\r\n'))
+    
+    stderr_thread.join(timeout=1.0)
+    return True
+
+
+# Windows 上 select 只支持 socket，管道需回退到线程读取
+_stream_output = _stream_output_threaded if os.name == 'nt' else _stream_output_selectors
+
+
+class _AllStopEvents:
+    """多个停止事件的组合，全部触发时才视为停止，批量中只要还有任务需要结果就继续运行"""
+    
+    __slots__ = ('events',)
+    
+    def __init__(self, events):
+        self.events = events
+    
+    def is_set(self):
+        return all(event.is_set() for event in self.events)
+
+
+def _ps_handle(process):
+    """
+    进程启动后立即获取 psutil 句柄并复用，终止时无需再按 PID 查找进程
+    
+    Args:
+        process: subprocess.Popen 对象
+    
+    Returns:
+        psutil.Process: 进程句柄，进程已退出时返回 None
+    """
+    try:
+        return psutil.Process(process.pid)
+    except psutil.NoSuchProcess:
+        return None
+
+
+def _kill_process_tree(parent):
+    """
+    终止进程及其所有子进程（Windows 和 *nix 通用）
+    
+    Args:
+        parent: psutil 进程句柄，为 None 时表示进程已退出
+    """
+    if parent is None:
+        return
+    try:
+        for child in parent.children(recursive=True):
+            child.kill()
+        parent.kill()
+    except psutil.NoSuchProcess:
+        pass
+    except Exception as e:
+        logger.error(f"终止进程时出错: {e}")
+
+
+def _load_json_output(json_path):
+    """
+    读取 whisper.cpp -oj 生成的 JSON 结果
+    
+    Args:
+        json_path: JSON 文件路径
+    
+    Returns:
+        tuple: (与标准输出格式相同的带时间戳文本, 分段列表)
+    """
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    # 分词边界可能截断多字节字符，先按替换模式解码
+    content = raw.decode('utf-8', errors='replace')
+    data = orjson.loads(content) if orjson is not None else json.loads(content)
+    
+    lines = []
+    segments = []
+    for item in data.get('transcription', []):
+        offsets = item.get('offsets', {})
+        timestamps = item.get('timestamps', {})
+        text = item.get('text', '').strip()
+        start = timestamps.get('from', '').replace(',', '.')
+        end = timestamps.get('to', '').replace(',', '.')
+        lines.append(f"[{start} --> {end}]  {text}")
+        segments.append({
+            "start": offsets.get('from', 0) / 1000.0,
+            "end": offsets.get('to', 0) / 1000.0,
+            "text": text
+        })
+    return "\n".join(lines), segments
+
+
+def run_whisper_batch(cmd, audio_paths, progress_callbacks, stop_event=None, durations=None):
+    """
+    一次 Whisper 进程转录多个文件，模型只加载一次
+    
+    whisper.cpp 按顺序处理每个 -f 文件，并在 stderr 输出 "processing '<文件>'"，据此把进度归到对应文件；
+    结果从每个文件旁的 -oj JSON 读取
+    
+    Args:
+        cmd: 命令列表（已包含所有 -f 参数和 -oj）
+        audio_paths: 命令中的音频文件路径，顺序与回调一致
+        progress_callbacks: 每个文件的进度回调函数
+        stop_event: 停止事件
+        durations: 每个文件的音频时长（秒）
+    
+    Returns:
+        list: 与 audio_paths 一一对应的转录结果
+    """
+    logger.info(f"运行 Whisper.cpp 批量命令: {' '.join(cmd)}")
+    
+    index = {path: i for i, path in enumerate(audio_paths)}
+    durations = durations or [None] * len(audio_paths)
+    stderr_data = []
+    current = -1
+    last_progress_time = time.time()
+    debug_on = logger.isEnabledFor(logging.DEBUG)
+    
+    def on_stdout(line):
+        nonlocal last_progress_time
+        if debug_on:
+            logger.debug("STDOUT: %s", line.rstrip())
+        if current < 0 or not (line[:1] == '[' and line[14:17] == '-->'):
+            return
+        now = time.time()
+        if now - last_progress_time >= 0.5:  # 每0.5秒最多更新一次
+            progress = min(int(_ts_to_seconds(line[1:13]) / (durations[current] or 100.0) * 100), 95)
+            progress_callbacks[current](progress, f"转录中: {progress}% 完成")
+            last_progress_time = now
+    
+    def on_stderr(line):
+        nonlocal current
+        stderr_data.append(line)
+        if debug_on:
+            logger.debug("STDERR: %s", line.rstrip())
+        start = line.find("processing '")
+        if start >= 0:
+            start += len("processing '")
+            i = index.get(line[start:line.find("'", start)])
+            if i is not None:
+                current = i
+                progress_callbacks[i](0, "转录中: 0% 完成")
+    
+    env = os.environ.copy()
+    env["PYTHONUNBUFFERED"] = "1"
+    process = _spawn(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    ps_proc = _ps_handle(process)
+    try:
+        if not _stream_output(process, on_stdout, on_stderr, stop_event):
+            logger.info("停止事件已触发。终止 Whisper.cpp 批量进程...")
+            _kill_process_tree(ps_proc)
+        exit_code = process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+    
+    logger.info(f"Whisper.cpp 批量进程退出，退出代码: {exit_code}")
+    stderr_text = '\n'.join(stderr_data)
+    
+    results = []
+    for path in audio_paths:
+        json_path = _json_output_path(path)
+        try:
+            text, segments = _load_json_output(json_path)
+            results.append({'text': text, 'segments': segments, 'stderr': stderr_text, 'cancelled': False})
+        except (OSError, ValueError) as e:
+            # 进程中途失败或被停止时，后续文件没有结果
+            results.append({
+                'text': f"转录失败: 进程退出代码 {exit_code}\n{stderr_text}",
+                'segments': [],
+                'stderr': stderr_text or str(e),
+                'cancelled': True
+            })
+        finally:
+            try:
+                os.remove(json_path)
+            except FileNotFoundError:
+                pass
+    return results
+
+
+def _parse_segment(line):
+    """
+    解析 whisper.cpp 标准输出中的时间戳行
+    
+    Args:
+        line: 输出行
+    
+    Returns:
+        dict: 分段数据，不是时间戳行时返回 None
+    """
+    # 时间戳行为定宽格式 "[HH:MM:SS.mmm --> ...]"，先按位置快速过滤
+    if line[:1] != '[' or line[14:17] != '-->':
+        return None
+    match = TIMESTAMP_RE.match(line)
+    if match is None:
+        return None
+    start_str, end_str, text_str = match.groups()
+    return {
+        "start": _ts_to_seconds(start_str),
+        "end": _ts_to_seconds(end_str),
+        "text": text_str.strip()
+    }
+
+
+def run_whisper_process(cmd, progress_callback=None, stop_event=None, total_duration=None, json_path=None):
     """
     运行 Whisper 进程
     
@@ -126,6 +672,8 @@ def run_whisper_process(cmd, progress_callback=None, stop_event=None):
         cmd: 命令列表
         progress_callback: 进度回调函数
         stop_event: 停止事件
+        total_duration: 音频时长（秒），用于计算进度，未知时按100秒估算
+        json_path: whisper.cpp -oj 输出的 JSON 路径，提供时分段从 JSON 读取，标准输出只用于进度
     
     Returns:
         dict: 转录结果
@@ -138,103 +686,69 @@ def run_whisper_process(cmd, progress_callback=None, stop_event=None):
     process = None
     stdout_lines = []
     stderr_data = []
+    segments = []
     cancelled = False
+    duration = total_duration or 100.0
     
     try:
-        # 确保编码为 utf-8，以正确捕获重音字符
-        process = subprocess.Popen(
+        # 以字节读取输出，按 utf-8 解码，以正确捕获重音字符
+        process = _spawn(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            env=env,
-            encoding='utf-8'
+            env=env
         )
         
-        process_id = process.pid
-        logger.info(f"Whisper.cpp 进程已启动 (PID {process_id})。")
+        ps_proc = _ps_handle(process)
+        logger.info(f"Whisper.cpp 进程已启动 (PID {process.pid})。")
         
-        # 在单独的线程上读取 stderr，这样它就不会阻塞
-        def read_stderr():
-            for line in iter(process.stderr.readline, ''):
-                if stop_event and stop_event.is_set():
-                    return
-                stderr_data.append(line)
-                logger.debug(f"STDERR: {line.strip()}")
-        
-        stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-        stderr_thread.start()
-        
-        # 时间戳行的简化模式
-        timestamp_pattern = (
-            r'\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> '      # group(1) 开始时间
-            r'(\d{2}:\d{2}:\d{2}\.\d{3})\]'            # group(2) 结束时间
-            r' (.*)'                                   # group(3) 文本
-        )
-        
-        # 持续读取 stdout 以获取进度行
         last_progress_time = time.time()
-        while process.poll() is None:
-            if stop_event and stop_event.is_set():
-                logger.info("停止事件已触发。终止 Whisper.cpp 进程...")
-                
-                # 在 Windows 或 *nix 上终止
-                try:
-                    parent = psutil.Process(process_id)
-                    for child in parent.children(recursive=True):
-                        child.kill()
-                    parent.kill()
-                except psutil.NoSuchProcess:
-                    pass
-                except Exception as e:
-                    logger.error(f"终止进程时出错: {e}")
-                
-                cancelled = True
-                break
-            
-            line = process.stdout.readline()
-            if line:
-                stdout_lines.append(line)
-                logger.debug(f"STDOUT: {line.strip()}")
-                # 尝试从时间戳解析进度
-                match_for_progress = re.search(
-                    r'\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> (\d{2}:\d{2}:\d{2}\.\d{3})\]',
-                    line.strip()
-                )
-                if match_for_progress:
-                    start_str = match_for_progress.group(1)
-                    try:
-                        h, m, s_milli = start_str.split(':')
-                        s, ms = s_milli.split('.')
-                        current_time = (int(h) * 3600 + int(m) * 60 + int(s)) + (float(ms) / 1000.0)
-                        progress = min(int((current_time / 100.0) * 100), 95)  # 假设音频长度为100秒，最大进度为95%
-                        
-                        # 限制进度更新频率，避免过多的更新
-                        current_time = time.time()
-                        if current_time - last_progress_time >= 0.5:  # 每0.5秒最多更新一次
-                            if progress_callback:
-                                progress_callback(progress, f"转录中: {progress}% 完成")
-                            last_progress_time = current_time
-                    except Exception as e:
-                        logger.error(f"解析进度时出错: {e}")
-            else:
-                time.sleep(0.1)
+        # 默认日志级别为 INFO，提前判断一次，避免每行输出都格式化调试日志
+        debug_on = logger.isEnabledFor(logging.DEBUG)
         
-        # 处理剩余的 stdout
-        for line in process.stdout:
+        def on_stdout(line):
+            nonlocal last_progress_time
             stdout_lines.append(line)
-            logger.debug(f"STDOUT: {line.strip()}")
+            if debug_on:
+                logger.debug("STDOUT: %s", line.rstrip())
+            if json_path:
+                # 分段结果从 JSON 读取，这里只按位置切出开始时间用于进度
+                if line[:1] != '[' or line[14:17] != '-->':
+                    return
+                start = _ts_to_seconds(line[1:13])
+            else:
+                # 没有 JSON 输出时在读取时直接解析出分段
+                segment = _parse_segment(line)
+                if segment is None:
+                    return
+                segments.append(segment)
+                start = segment["start"]
+            
+            # 限制进度更新频率，避免过多的更新
+            now = time.time()
+            if now - last_progress_time >= 0.5:  # 每0.5秒最多更新一次
+                progress = min(int((start / duration) * 100), 95)  # 最大进度为95%
+                if progress_callback:
+                    progress_callback(progress, f"转录中: {progress}% 完成")
+                last_progress_time = now
+        
+        def on_stderr(line):
+            stderr_data.append(line)
+            if debug_on:
+                logger.debug("STDERR: %s", line.rstrip())
         
-        # 等待 stderr 完成
-        stderr_thread.join(timeout=1.0)
+        # 持续读取 stdout/stderr，有输出时才唤醒，不再轮询休眠
+        if not _stream_output(process, on_stdout, on_stderr, stop_event):
+            logger.info("停止事件已触发。终止 Whisper.cpp 进程...")
+            _kill_process_tree(ps_proc)
+            cancelled = True
         
         # 检查进程退出代码
-        exit_code = process.returncode
+        exit_code = process.wait()
         logger.info(f"Whisper.cpp 进程退出，退出代码: {exit_code}")
         
         if exit_code != 0:
-            stderr_text = ''.join(stderr_data)
+            stderr_text = '\n'.join(stderr_data)
             logger.error(f"Whisper.cpp 进程失败: {stderr_text}")
             if progress_callback:
                 progress_callback(0, f"转录失败: 进程退出代码 {exit_code}")
@@ -256,7 +770,7 @@ def run_whisper_process(cmd, progress_callback=None, stop_event=None):
         return {
             'text': f"转录过程中出错: {str(e)}",
             'segments': [],
-            'stderr': ''.join(stderr_data),
+            'stderr': '\n'.join(stderr_data),
             'cancelled': True
         }
     
@@ -276,7 +790,7 @@ def run_whisper_process(cmd, progress_callback=None, stop_event=None):
         return {
             'text': "转录已被用户取消。",
             'segments': [],
-            'stderr': ''.join(stderr_data),
+            'stderr': '\n'.join(stderr_data),
             'cancelled': True
         }
     
@@ -284,56 +798,22 @@ def run_whisper_process(cmd, progress_callback=None, stop_event=None):
     if progress_callback:
         progress_callback(90, "处理转录结果...")
     
-    output_text = "".join(stdout_lines).strip()
-    segments = []
-    full_text = ""
-    
-    # 从 whisper 输出解析段
-    timestamp_pattern = (
-        r'\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> '      # group(1) 开始时间
-        r'(\d{2}:\d{2}:\d{2}\.\d{3})\]'            # group(2) 结束时间
-        r' (.*)'                                   # group(3) 文本
-    )
-    
-    for line in output_text.split('\n'):
-        line = line.strip()
-        match = re.search(timestamp_pattern, line)
-        if match:
-            start_str = match.group(1)
-            end_str   = match.group(2)
-            text_str  = match.group(3).strip() if match.group(3) else ""
-            
-            # 将 HH:MM:SS.mmm 格式的开始/结束时间转换为秒
-            try:
-                h1, m1, s1ms = start_str.split(':')
-                s1, ms1 = s1ms.split('.')
-                stime = int(h1)*3600 + int(m1)*60 + int(s1) + float(ms1)/1000
-                
-                h2, m2, s2ms = end_str.split(':')
-                s2, ms2 = s2ms.split('.')
-                etime = int(h2)*3600 + int(m2)*60 + int(s2) + float(ms2)/1000
-            except:
-                stime, etime = 0.0, 0.0
-            
-            seg_data = {
-                "start": stime,
-                "end":   etime,
-                "text":  text_str
-            }
-            segments.append(seg_data)
-            
-            if full_text:
-                full_text += " " + text_str
-            else:
-                full_text = text_str
+    output_text = "\n".join(stdout_lines).strip()
+    
+    if json_path:
+        # 直接使用 whisper.cpp 生成的结构化结果，读取失败时退回解析标准输出
+        try:
+            _, segments = _load_json_output(json_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取 JSON 结果失败，改为解析标准输出: {json_path}, 错误: {str(e)}")
+            segments = [segment for segment in map(_parse_segment, stdout_lines) if segment is not None]
     
     # 如果没有带时间戳的段，将整个输出视为文本
     if not segments:
-        full_text = output_text
         segments.append({
             "start": 0.0,
-            "end": 100.0,  # 假设音频长度为100秒
-            "text": full_text
+            "end": duration,
+            "text": output_text
         })
     
     if progress_callback:
@@ -342,11 +822,341 @@ def run_whisper_process(cmd, progress_callback=None, stop_event=None):
     return {
         'text': output_text,  # 返回带时间戳的原始 Whisper 输出
         'segments': segments,
-        'stderr': ''.join(stderr_data),
+        'stderr': '\n'.join(stderr_data),
         'cancelled': False
     }
 
 
+def _seconds_to_ts(seconds):
+    """
+    将秒数转换为 whisper.cpp 标准输出使用的 HH:MM:SS.mmm 格式
+    
+    Args:
+        seconds: 秒数
+    
+    Returns:
+        str: 时间戳字符串
+    """
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+
+
+class WhisperWorkerPool:
+    """
+    常驻的 whisper-server 进程池，每个模型一个进程
+    
+    模型只在进程启动时加载一次，之后的转录通过本地 HTTP 接口提交，省去每次启动 whisper-cli 加载模型的时间。
+    whisper-server 内部串行处理请求，同一模型的并发转录会排队执行
+    """
+    
+    # 等待新进程加载模型并开始监听的最长时间（秒）
+    START_TIMEOUT = 120
+    
+    def __init__(self):
+        """初始化进程池"""
+        self._workers = {}  # 模型路径 -> (进程, 端口)
+        self._start_locks = {}  # 模型路径 -> 启动锁，同一模型只启动一个进程，不同模型互不阻塞
+        self._lock = threading.Lock()  # 保护上面两个字典，不在持有时启动进程
+        self._watched = {}  # 转录中的连接 -> 停止事件
+        self._watch_cv = threading.Condition()  # 保护 _watched，并在有连接需要监视时唤醒监视线程
+        self._watcher = None  # 所有请求共用的停止事件监视线程
+        atexit.register(self.shutdown)
+    
+    @staticmethod
+    def _server_executable():
+        """
+        whisper-server 与 whisper-cli 位于同一目录
+        
+        Returns:
+            str: whisper-server 可执行文件路径
+        """
+        cli = resolve_whisper_executable(config.whisper_executable)
+        name = "whisper-server.exe" if os.name == "nt" else "whisper-server"
+        return os.path.join(os.path.dirname(cli), name)
+    
+    def _start(self, model_path):
+        """
+        启动加载指定模型的 whisper-server，等待其开始监听
+        
+        Args:
+            model_path: 模型路径
+        
+        Returns:
+            tuple: (进程, 端口)
+        """
+        # 由系统分配空闲端口
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        
+        cmd = [self._server_executable(), "-m", model_path, "--host", "127.0.0.1", "--port", str(port)]
+        processors = int(config.whisper_processors or 1)
+        if processors > 1:
+            cmd.extend(["--processors", str(processors)])
+        
+        logger.info(f"启动常驻 Whisper 进程: {' '.join(cmd)}")
+        process = _spawn(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        
+        deadline = time.time() + self.START_TIMEOUT
+        while time.time() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"whisper-server 启动失败，退出代码 {process.returncode}")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return process, port
+            except OSError:
+                time.sleep(0.2)
+        
+        _kill_process_tree(_ps_handle(process))
+        raise RuntimeError("whisper-server 启动超时")
+    
+    def _get(self, model_path):
+        """
+        获取模型对应的常驻进程，不存在或已退出时启动新进程
+        
+        启动只持有该模型的启动锁，加载模型期间其他模型的请求不受影响
+        
+        Args:
+            model_path: 模型路径
+        
+        Returns:
+            tuple: (进程, 端口)
+        """
+        with self._lock:
+            worker = self._workers.get(model_path)
+            if worker is not None and worker[0].poll() is None:
+                return worker
+            start_lock = self._start_locks.setdefault(model_path, threading.Lock())
+        
+        with start_lock:
+            # 等待启动锁期间可能已由其他请求启动
+            with self._lock:
+                worker = self._workers.get(model_path)
+            if worker is None or worker[0].poll() is not None:
+                worker = self._start(model_path)
+                with self._lock:
+                    self._workers[model_path] = worker
+            return worker
+    
+    def discard(self, model_path, process=None):
+        """
+        终止模型对应的常驻进程，下次使用时重新启动
+        
+        Args:
+            model_path: 模型路径
+            process: 只在当前进程仍是该进程时终止，None 表示不检查
+        """
+        with self._lock:
+            worker = self._workers.get(model_path)
+            if worker is None or (process is not None and worker[0] is not process):
+                return
+            del self._workers[model_path]
+        if worker[0].poll() is None:
+            _kill_process_tree(_ps_handle(worker[0]))
+    
+    def shutdown(self):
+        """终止所有常驻进程"""
+        for model_path in list(self._workers):
+            self.discard(model_path)
+    
+    def _watch(self, conn, stop_event):
+        """
+        登记转录中的连接，停止事件触发时由监视线程断开该连接
+        
+        Args:
+            conn: 已建立的 HTTP 连接
+            stop_event: 停止事件
+        """
+        with self._watch_cv:
+            self._watched[conn] = stop_event
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch_loop, name='whisper-server-watch', daemon=True)
+                self._watcher.start()
+            self._watch_cv.notify()
+    
+    def _unwatch(self, conn):
+        """
+        取消连接的登记
+        
+        Args:
+            conn: HTTP 连接
+        """
+        with self._watch_cv:
+            self._watched.pop(conn, None)
+    
+    def _watch_loop(self):
+        """监视所有转录中连接的停止事件，没有连接时阻塞等待，不轮询"""
+        while True:
+            with self._watch_cv:
+                while not self._watched:
+                    self._watch_cv.wait()
+                stopped = [conn for conn, stop_event in self._watched.items() if stop_event.is_set()]
+                for conn in stopped:
+                    del self._watched[conn]
+            
+            # 只断开被取消请求自己的连接，阻塞中的读取立即失败，常驻进程和其他请求不受影响
+            for conn in stopped:
+                try:
+                    conn.sock.shutdown(socket.SHUT_RDWR)
+                except (AttributeError, OSError):
+                    pass
+            time.sleep(_STOP_POLL_INTERVAL)
+    
+    def transcribe(self, model_path, wav_path, options, stop_event=None):
+        """
+        提交 WAV 文件到常驻进程转录
+        
+        Args:
+            model_path: 模型路径
+            wav_path: WAV 文件路径（16kHz 单声道）
+            options: 转录选项
+            stop_event: 停止事件，触发时断开本次请求的连接以中断等待
+        
+        Returns:
+            dict: 转录结果
+        """
+        process, port = self._get(model_path)
+        
+        fields = {
+            'response_format': 'verbose_json',
+            'language': options.get('language', 'auto'),
+            'beam_size': str(options.get('beam_size', 5)),
+            'translate': 'true' if options.get('task') == "translate" else 'false'
+        }
+        boundary = uuid.uuid4().hex
+        head = b''.join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="audio.wav"\r\n'
+            f'Content-Type: audio/wav\r\n\r\n'
+        ).encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        
+        def body():
+            # 分块发送音频，不把整个文件读入内存
+            yield head
+            with open(wav_path, 'rb') as f:
+                while True:
+                    chunk = f.read(_PIPE_READ_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+            yield tail
+        
+        cancelled = {'text': "转录已被用户取消。", 'segments': [], 'stderr': '', 'cancelled': True}
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        try:
+            # 先建立连接再登记监视，监视线程断开的一定是本次请求的连接
+            conn.connect()
+            if stop_event is not None:
+                self._watch(conn, stop_event)
+            conn.request('POST', '/inference', body=body(), headers={
+                'Content-Type': f'multipart/form-data; boundary={boundary}',
+                'Content-Length': str(len(head) + os.path.getsize(wav_path) + len(tail))
+            })
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            if stop_event is not None and stop_event.is_set():
+                return cancelled
+            # 进程异常退出时丢弃，下次重新启动；进程仍在运行时保留，不影响其他请求
+            if process.poll() is not None:
+                self.discard(model_path, process)
+            raise
+        finally:
+            if stop_event is not None:
+                self._unwatch(conn)
+            conn.close()
+        
+        if stop_event is not None and stop_event.is_set():
+            return cancelled
+        
+        if response.status != 200:
+            error = payload.decode('utf-8', errors='replace')
+            return {'text': f"转录失败: {error}", 'segments': [], 'stderr': error, 'cancelled': True}
+        
+        content = payload.decode('utf-8', errors='replace')
+        data = orjson.loads(content) if orjson is not None else json.loads(content)
+        lines = []
+        segments = []
+        for item in data.get('segments', []):
+            text = item.get('text', '').strip()
+            start = item.get('start', 0.0)
+            end = item.get('end', 0.0)
+            lines.append(f"[{_seconds_to_ts(start)} --> {_seconds_to_ts(end)}]  {text}")
+            segments.append({"start": start, "end": end, "text": text})
+        
+        return {'text': "\n".join(lines), 'segments': segments, 'stderr': '', 'cancelled': False}
+
+
+# 常驻进程池，仅在配置 persistent_workers 时使用
+worker_pool = WhisperWorkerPool()
+
+
+def _take_wav(file_path):
+    """
+    获取文件转换后的 WAV，优先使用上传后已在后台完成的转换
+    
+    Args:
+        file_path: 音频文件路径
+    
+    Returns:
+        str: WAV 文件路径
+    """
+    with _prepared_lock:
+        prepared = _prepared_audio.pop(file_path, None)
+    if prepared is not None:
+        return prepared.result()
+    return convert_audio_to_wav(file_path, FileUtils.get_project_path(config.temp_folder))
+
+
+def _check_model(model_name):
+    """
+    检查模型是否受支持且模型文件存在
+    
+    Args:
+        model_name: 模型名称
+    
+    Returns:
+        tuple: (模型文件路径, 错误信息)，检查通过时错误信息为 None
+    """
+    if f"ggml-{model_name}.bin" not in config.allowed_model_set:
+        logger.error(f"不支持的模型: {model_name}")
+        return None, f"不支持的模型 {model_name}"
+    
+    model_path = resolve_model_path(model_name)
+    if not os.path.exists(model_path):
+        logger.error(f"模型文件不存在: {model_path}")
+        return None, f"模型文件 {model_path} 不存在，请确保已下载模型"
+    
+    return model_path, None
+
+
+def _error_result(error, temp_audio_path=None):
+    """
+    构建失败的转录结果
+    
+    Args:
+        error: 错误信息
+        temp_audio_path: 临时音频文件路径
+    
+    Returns:
+        dict: 转录结果
+    """
+    return {
+        'text': f"错误: {error}",
+        'segments': [],
+        'stderr': error,
+        'cancelled': True,
+        'temp_audio_path': temp_audio_path
+    }
+
+
 def transcribe_audio(file_path, options, progress_callback=None, stop_event=None):
     """
     使用 Whisper.cpp 转录音频
@@ -365,32 +1175,35 @@ def transcribe_audio(file_path, options, progress_callback=None, stop_event=None
     temp_wav_path = None
     try:
         # 转换音频为 WAV 格式
-        temp_wav_path = convert_audio_to_wav(file_path, FileUtils.get_project_path(config.get('temp_folder')))
+        temp_wav_path = _take_wav(file_path)
         
-        # 获取模型路径
-        model_name = options.get('model_name', 'base')
-        model_path = os.path.join(
-            FileUtils.get_project_path(config.get('models_folder')),
-            f"ggml-{model_name}.bin"
-        )
-        
-        # 检查模型文件是否存在
-        if not os.path.exists(model_path):
-            logger.error(f"模型文件不存在: {model_path}")
+        # 获取并检查模型
+        model_path, error = _check_model(options.get('model_name', 'base'))
+        if error:
             if progress_callback:
-                progress_callback(0, f"错误: 模型文件 {model_path} 不存在")
-            return {
-                'text': f"错误: 模型文件 {model_path} 不存在，请确保已下载模型",
-                'segments': [],
-                'stderr': f"模型文件 {model_path} 不存在",
-                'cancelled': True
-            }
+                progress_callback(0, f"错误: {error}")
+            return _error_result(error)
         
-        # 构建 Whisper 命令
-        cmd = build_whisper_command(model_path, temp_wav_path, options)
-        
-        # 运行 Whisper 进程
-        result = run_whisper_process(cmd, progress_callback, stop_event)
+        if config.persistent_workers:
+            # 提交到已加载模型的常驻进程
+            if progress_callback:
+                progress_callback(5, "转录中...")
+            result = worker_pool.transcribe(
+                FileUtils.get_project_path(model_path),
+                FileUtils.get_project_path(temp_wav_path),
+                options,
+                stop_event
+            )
+            if progress_callback and not result['cancelled']:
+                progress_callback(100, "转录成功完成")
+        else:
+            # 构建 Whisper 命令
+            cmd = build_whisper_command(model_path, temp_wav_path, options)
+            
+            # 运行 Whisper 进程，按音频实际时长计算进度
+            result = run_whisper_process(
+                cmd, progress_callback, stop_event, get_wav_duration(temp_wav_path), _json_output_path(temp_wav_path)
+            )
         
         # 添加临时文件路径到结果
         result['temp_audio_path'] = temp_wav_path
@@ -408,5 +1221,80 @@ def transcribe_audio(file_path, options, progress_callback=None, stop_event=None
         }
     
     finally:
-        # 根据配置清理临时文件
-        cleanup_temp_file(temp_wav_path) 
\ No newline at end of file
+        # 根据配置清理临时文件；JSON 结果已读入内存，总是删除
+        cleanup_temp_file(temp_wav_path)
+        if temp_wav_path:
+            try:
+                os.remove(_json_output_path(temp_wav_path))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"无法删除 JSON 结果文件: {str(e)}")
+
+
+def transcribe_audio_batch(file_paths, options, progress_callbacks, stop_events):
+    """
+    用一次 Whisper.cpp 调用转录多个使用相同选项的文件，模型加载和初始化只需一次
+    
+    Args:
+        file_paths: 音频文件路径列表
+        options: 转录选项（所有文件共用）
+        progress_callbacks: 每个文件的进度回调函数
+        stop_events: 每个文件的停止事件，全部触发时才终止进程
+    
+    Returns:
+        list: 与 file_paths 一一对应的转录结果
+    """
+    logger.info(f"开始批量转录 {len(file_paths)} 个文件")
+    
+    results = [None] * len(file_paths)
+    wav_paths = [None] * len(file_paths)
+    try:
+        model_path, error = _check_model(options.get('model_name', 'base'))
+        
+        # 转换音频，转换失败的文件单独记为失败，不影响批量中的其他文件
+        for i, file_path in enumerate(file_paths):
+            if error:
+                release_prepared_audio(file_path)
+                results[i] = _error_result(error)
+                continue
+            try:
+                wav_paths[i] = _take_wav(file_path)
+            except Exception as e:
+                results[i] = _error_result(str(e))
+        
+        batch = [i for i, wav in enumerate(wav_paths) if wav is not None]
+        if batch:
+            # 在单文件命令的基础上追加其余文件
+            cmd = build_whisper_command(model_path, wav_paths[batch[0]], options)
+            for i in batch[1:]:
+                cmd.extend(["-f", FileUtils.get_project_path(wav_paths[i]), "-of", _output_base(wav_paths[i])])
+            
+            batch_results = run_whisper_batch(
+                cmd,
+                [FileUtils.get_project_path(wav_paths[i]) for i in batch],
+                [progress_callbacks[i] for i in batch],
+                _AllStopEvents([stop_events[i] for i in batch]),
+                [get_wav_duration(wav_paths[i]) for i in batch]
+            )
+            for i, result in zip(batch, batch_results):
+                # 批量中途被单独取消的任务不采用其结果
+                if stop_events[i].is_set():
+                    result = {'text': "转录已被用户取消。", 'segments': [], 'stderr': result['stderr'], 'cancelled': True}
+                result['temp_audio_path'] = wav_paths[i]
+                results[i] = result
+    
+    except Exception as e:
+        logger.error(f"批量转录失败: {str(e)}")
+        for i, wav in enumerate(wav_paths):
+            if results[i] is None:
+                results[i] = _error_result(str(e), wav)
+    
+    finally:
+        for wav in wav_paths:
+            cleanup_temp_file(wav)
+    
+    for i, result in enumerate(results):
+        if not result['cancelled']:
+            progress_callbacks[i](100, "转录成功完成")
+    return results